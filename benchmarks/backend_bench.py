@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Compare pose model backends on the same frames: speed and keypoint agreement.
+
+Every backend (PyTorch, ONNX Runtime, OpenVINO, INT8 ONNX) runs the frames of SOURCE
+one at a time. The report lists frames/s and p50/p95 latency per backend,
+plus how closely each backend's detections match the PyTorch ones. It gives
+the share of frames with the same people count, and the keypoint distance of
+matched people as a fraction of their box height. ONNX and OpenVINO exports
+are created on the first run and cached like the server's --backend option;
+the INT8 model is quantized on --calibration (by default SOURCE) and is
+measured even when the server would reject it as too inaccurate.
+
+Usage:
+  python benchmarks/backend_bench.py SOURCE [--backends torch onnx openvino onnx-int8] [--frames 200] [--imgsz 640]
+
+SOURCE is a video file or an image directory.
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+from batch_bench import load_frames
+from pipeline_bench import ROOT
+
+
+def run(model, frames, imgsz):
+    """(detections, per-frame latencies in seconds) of `model` on `frames`."""
+    detections, latencies = [], []
+    for frame in frames:
+        start = time.perf_counter()
+        detections.append(model.detect(frame, imgsz=imgsz))
+        latencies.append(time.perf_counter() - start)
+    return detections, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pose model backend comparison')
+    parser.add_argument('source', help='Video file or image directory')
+    parser.add_argument('--backends', nargs='+', default=['torch', 'onnx', 'openvino'])
+    parser.add_argument('--frames', type=int, default=200)
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--model', help='Weights to export (default: the server\'s model)')
+    parser.add_argument('--calibration', help='Clip to quantize onnx-int8 on (default: SOURCE)')
+    args = parser.parse_args()
+    source = os.path.abspath(args.source)
+    calibration = os.path.abspath(args.calibration) if args.calibration else source
+    weights = os.path.abspath(args.model) if args.model else None
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import jump_server as js
+
+    unknown = set(args.backends) - set(js.MODEL_BACKENDS)
+    if unknown:
+        parser.error(f"unknown backends: {', '.join(sorted(unknown))}")
+    frames = load_frames(js, source, args.frames)
+    if not frames:
+        sys.exit(f"No frames could be read from {args.source}")
+
+    # PyTorch is the reference, so it always runs first
+    backends = ['torch'] + [backend for backend in args.backends if backend != 'torch']
+    results = {}
+    for backend in backends:
+        if backend == 'onnx-int8':
+            # Bypass the accuracy guardrail: this benchmark is where the trade-off gets measured
+            int8_path, _ = js.quantize_pose_model(weights or js.MODEL_PATH, args.imgsz, calibration)
+            model = js.PoseModel(int8_path, 'torch')  # 'torch' loads the given file as it is
+        else:
+            model = js.PoseModel(weights or js.MODEL_PATH, backend)
+        model.warm_up(args.imgsz)
+        if model.error:
+            print(f"{backend}: failed to load ({model.error})")
+            continue
+        results[backend] = run(model, frames, args.imgsz)
+    if 'torch' not in results:
+        sys.exit("The PyTorch reference failed to load")
+
+    reference = results['torch'][0]
+    print(f"Source {args.source}, {len(frames)} frames, imgsz {args.imgsz}")
+    print(f"{'backend':<9} {'frames/s':>9} {'p50':>8} {'p95':>8}  (ms)  {'same_count':>10} "
+          f"{'kp_err_mean':>11} {'kp_err_p95':>10}  (of box height)")
+    for backend in backends:
+        if backend not in results:
+            continue
+        detections, latencies = results[backend]
+        p50, p95 = np.percentile(latencies * 1000, (50, 95))
+        same_count, errors = js.pose_agreement(reference, detections)
+        mean_error = f"{errors.mean():11.4f}" if len(errors) else f"{'-':>11}"
+        p95_error = f"{np.percentile(errors, 95):10.4f}" if len(errors) else f"{'-':>10}"
+        print(f"{backend:<9} {len(latencies) / latencies.sum():9.1f} {p50:8.2f} {p95:8.2f}        "
+              f"{same_count:10.1%} {mean_error} {p95_error}")
+
+
+if __name__ == '__main__':
+    main()
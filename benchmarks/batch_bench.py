@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Throughput vs. latency of batched pose inference across several sources.
+
+Every source is a thread that feeds frames of SOURCE to one shared
+BatchedPoseModel, the way per-camera pipelines do when the server runs with
+several --source options. Each batch size and max-wait combination reports
+the total frames/s, the mean frames per model call and the p50/p95/p99
+time from submitting a frame to getting its detections back. Batch size 1
+is the unbatched baseline: every frame is a model call of its own.
+
+Usage:
+  python benchmarks/batch_bench.py SOURCE [--sources 4] [--batch-size 1 2 4] [--wait-ms 0 5 10]
+  python benchmarks/batch_bench.py SOURCE --fps 30   # cameras at a fixed frame rate
+
+SOURCE is a video file or an image directory. Without --fps the sources
+submit their next frame as soon as the previous one is back, which measures
+peak throughput; with --fps they are paced like cameras, which shows the
+latency a given load gets.
+"""
+
+import argparse
+import itertools
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+
+from pipeline_bench import ROOT
+
+
+def load_frames(js, source, count):
+    cap = js.open_capture_source(source)
+    frames = []
+    try:
+        while len(frames) < count:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frames.append(frame)
+    finally:
+        cap.release()
+    return frames
+
+
+class CountingModel:
+    """Pass-through to the pose model that records the size of every batch."""
+
+    def __init__(self, model):
+        self.model = model
+        self.sizes = []
+
+    def __getattr__(self, name):
+        return getattr(self.model, name)
+
+    def detect_batch(self, frames, **kwargs):
+        self.sizes.append(len(frames))
+        return self.model.detect_batch(frames, **kwargs)
+
+
+def run(js, frames, sources, max_batch, max_wait, imgsz, fps):
+    """(frames/s, mean batch size, per-frame latencies in seconds) for one setting."""
+    model = CountingModel(js.pose_model)
+    batched = js.BatchedPoseModel(model, max_batch, max_wait)
+    latencies = [[] for _ in range(sources)]
+
+    def feed(index):
+        next_time = time.perf_counter()
+        # Start each source at a different frame so batches do not repeat one image
+        for frame in itertools.islice(itertools.cycle(frames), index, index + len(frames)):
+            if fps:
+                next_time += 1.0 / fps
+                time.sleep(max(0.0, next_time - time.perf_counter()))
+            start = time.perf_counter()
+            batched.detect(frame, imgsz=imgsz)
+            latencies[index].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=feed, args=(i,)) for i in range(sources)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+    latency = np.concatenate([np.array(values) for values in latencies])
+    return len(latency) / elapsed, np.mean(model.sizes), latency
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Batched inference throughput vs. latency')
+    parser.add_argument('source', help='Video file or image directory')
+    parser.add_argument('--sources', type=int, default=4, help='Concurrent sources (default: 4)')
+    parser.add_argument('--frames', type=int, default=100, help='Frames per source (default: 100)')
+    parser.add_argument('--batch-size', type=int, nargs='+', default=[1, 2, 4])
+    parser.add_argument('--wait-ms', type=float, nargs='+', default=[0, 5, 10])
+    parser.add_argument('--fps', type=float, help='Pace each source at this frame rate (default: unpaced)')
+    parser.add_argument('--imgsz', type=int, default=640)
+    args = parser.parse_args()
+    source = os.path.abspath(args.source)
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import jump_server as js
+
+    frames = load_frames(js, source, args.frames)
+    if not frames:
+        sys.exit(f"No frames could be read from {args.source}")
+    js.pose_model.warm_up(args.imgsz)
+    if js.pose_model.error:
+        sys.exit(f"Pose model failed to load: {js.pose_model.error}")
+    # Warm up the batched input shapes as well, their first call is slow too
+    for size in set(args.batch_size):
+        js.pose_model.detect_batch(frames[:1] * size, imgsz=args.imgsz)
+
+    print(f"Source {args.source}, {args.sources} sources x {len(frames)} frames, imgsz {args.imgsz}, "
+          f"{'unpaced' if not args.fps else f'{args.fps:g} fps each'}")
+    print(f"{'batch':>5} {'wait_ms':>7} {'frames/s':>9} {'mean_batch':>10} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for max_batch in args.batch_size:
+        # Batch size 1 never waits, so one run covers every wait
+        for wait_ms in (args.wait_ms if max_batch > 1 else args.wait_ms[:1]):
+            throughput, mean_batch, latency = run(js, frames, args.sources, max_batch, wait_ms / 1000,
+                                                  args.imgsz, args.fps)
+            p50, p95, p99 = np.percentile(latency * 1000, (50, 95, 99))
+            print(f"{max_batch:5d} {wait_ms:7g} {throughput:9.1f} {mean_batch:10.2f} {p50:8.2f} {p95:8.2f} {p99:8.2f}")
+
+
+if __name__ == '__main__':
+    main()
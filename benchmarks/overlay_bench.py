@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the koala overlay: per-frame blend cost before and after
+pre-baking the sprites.
+
+Usage: python benchmarks/overlay_bench.py [--frames 500] [--width 1280 --height 720]
+"""
+
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from pipeline_bench import ROOT
+
+
+def make_rgba_sprite(size=400):
+    """Synthetic koala stand-in: opaque disc with a soft edge on a transparent background."""
+    rng = np.random.default_rng(0)
+    rgba = np.zeros((size, size, 4), dtype=np.uint8)
+    rgba[:, :, :3] = rng.integers(0, 256, (size, size, 3), dtype=np.uint8)
+    yy, xx = np.mgrid[:size, :size]
+    dist = np.hypot(yy - size / 2, xx - size / 2) / (size / 2)
+    rgba[:, :, 3] = (np.clip(1.2 - dist, 0, 1) * 255).astype(np.uint8)
+    return rgba
+
+
+def overlay_before(frame, koala_rgba, x, y, flip):
+    """The original per-frame overlay: copy, flip, convert and blend channel by channel."""
+    koala = koala_rgba.copy()
+    if flip:
+        koala = cv2.flip(koala, 1)
+    roi = frame[y:y + koala.shape[0], x:x + koala.shape[1]]
+    koala_bgr = cv2.cvtColor(koala, cv2.COLOR_RGBA2BGR)
+    alpha = koala[:, :, 3] / 255.0
+    alpha = np.clip(alpha * 1.2, 0, 1)
+    for c in range(3):
+        roi[:, :, c] = (1 - alpha) * roi[:, :, c] + alpha * koala_bgr[:, :, c]
+    frame[y:y + koala.shape[0], x:x + koala.shape[1]] = roi
+
+
+def overlay_after(js, frame, sprites, flipped_sprites, x, y, flip):
+    sprite = flipped_sprites[0] if flip else sprites[0]
+    roi = frame[y:y + sprite.shape[0], x:x + sprite.shape[1]]
+    js.blend_sprite(roi, sprite)
+
+
+def bench(fn, frames, base):
+    frame = base.copy()
+    timings = []
+    for i in range(frames):
+        np.copyto(frame, base)
+        start = time.perf_counter()
+        fn(frame, i % 2 == 1)
+        timings.append(time.perf_counter() - start)
+    timings = np.array(timings) * 1000
+    return np.median(timings), np.percentile(timings, 95)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Koala overlay microbenchmark')
+    parser.add_argument('--frames', type=int, default=500)
+    parser.add_argument('--width', type=int, default=1280)
+    parser.add_argument('--height', type=int, default=720)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import jump_server as js
+
+    rgba = make_rgba_sprite()
+    sprite = js.Sprite.from_rgba(rgba, js.KOALA_ALPHA_BOOST)
+    sprites, flipped_sprites = [sprite], [sprite.flipped()]
+    base = np.random.default_rng(1).integers(0, 256, (args.height, args.width, 3), dtype=np.uint8)
+    x, y = 100, 50
+
+    # Both paths must draw the same image
+    a, b = base.copy(), base.copy()
+    overlay_before(a, rgba, x, y, True)
+    overlay_after(js, b, sprites, flipped_sprites, x, y, True)
+    max_diff = int(np.abs(a.astype(np.int16) - b.astype(np.int16)).max())
+
+    before = bench(lambda f, flip: overlay_before(f, rgba, x, y, flip), args.frames, base)
+    after = bench(lambda f, flip: overlay_after(js, f, sprites, flipped_sprites, x, y, flip), args.frames, base)
+
+    print(f"Frame {args.width}x{args.height}, sprite 400x400, {args.frames} frames")
+    print(f"  before: median {before[0]:.3f} ms  p95 {before[1]:.3f} ms")
+    print(f"  after:  median {after[0]:.3f} ms  p95 {after[1]:.3f} ms")
+    print(f"  speedup: {before[0] / after[0]:.1f}x  (max pixel difference {max_diff})")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+#!/usr/bin/env python3
+"""
+Offline replay benchmark for the vision pipeline.
+
+Runs a recorded source frame by frame through capture, pose inference, game
+logic, overlay drawing and JPEG encoding on a deterministic clock, and
+reports per-stage timings, frames/s and p50/p95/p99 latency. No camera is
+needed, so performance regressions show up on any Linux box.
+
+Usage:
+  python benchmarks/pipeline_bench.py SOURCE [--feed br31] [--frames N] [--imgsz 640]
+  python benchmarks/pipeline_bench.py --labels clips.json
+
+SOURCE is a video file, an image directory or a pose recording (an .npz
+file or a directory written by `jump_server.py --record`), which skips
+inference. A labels file lists clips with their expected
+synchronized jump count as counted by the BR31 game:
+
+  [{"source": "clips/two_people_3_jumps.mp4", "jumps": 3},
+   {"source": "clips/frames_dir", "jumps": 5, "fps": 15, "tolerance": 1}]
+
+Paths are relative to the labels file. The run exits with status 1 when any
+clip's count is off by more than its tolerance (default 0).
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAGES = ('capture', 'inference', 'game', 'overlay', 'encode')
+
+
+def replay(js, source, listeners=(), draw=None, quality=None, width=None, imgsz=None,
+           max_frames=None, fps=None):
+    """Run every frame of `source` through the pipeline stages.
+
+    Returns an (frames, stages) array of timings in seconds. Stages that do
+    not apply (inference for keypoint recordings, overlay and encode without
+    `draw`) are recorded as zero.
+    """
+    cap = js.open_capture_source(source)
+    if fps:
+        cap.fps = fps
+    clock = js.ReplayClock()
+    tracker = js.PoseTracker()
+    timings = []
+    frame_id = 0
+    try:
+        while max_frames is None or frame_id < max_frames:
+            stage = np.zeros(len(STAGES))
+            start = time.perf_counter()
+            ok, frame = cap.read()
+            stage[0] = time.perf_counter() - start
+            if not ok:
+                break
+            frame_id += 1
+            if cap.timestamp is not None:
+                clock.advance_to(cap.timestamp)
+            elif frame_id > 1:
+                clock.sleep(1.0 / (cap.fps or js.REPLAY_DEFAULT_FPS))
+            timestamp = clock.now()
+
+            start = time.perf_counter()
+            if cap.poses is not None:
+                result = js.PoseResult(frame_id, timestamp, frame, *cap.poses)
+            else:
+                results = js.pose_model(frame, imgsz=imgsz)
+                result = js.PoseResult.from_yolo(frame_id, timestamp, frame, results[0])
+            result.track_ids = tracker.update(result.boxes, result.keypoints, timestamp)
+            stage[1] = time.perf_counter() - start
+
+            start = time.perf_counter()
+            for listener in listeners:
+                listener(result)
+            stage[2] = time.perf_counter() - start
+
+            if draw is not None:
+                start = time.perf_counter()
+                canvas = frame.copy()
+                draw(canvas, result)
+                stage[3] = time.perf_counter() - start
+
+                start = time.perf_counter()
+                js.encode_mjpeg_part(js.resize_to_width(canvas, width), quality)
+                stage[4] = time.perf_counter() - start
+            timings.append(stage)
+    finally:
+        cap.release()
+    return np.array(timings).reshape(-1, len(STAGES))
+
+
+def report(timings):
+    ms = timings * 1000
+    latency = ms.sum(axis=1)
+    print(f"{'stage':<10} {'mean':>8} {'p50':>8} {'p95':>8} {'p99':>8}  (ms)")
+    for name, column in zip(STAGES + ('total',), list(ms.T) + [latency]):
+        p50, p95, p99 = np.percentile(column, (50, 95, 99))
+        print(f"{name:<10} {column.mean():8.2f} {p50:8.2f} {p95:8.2f} {p99:8.2f}")
+    print(f"Throughput: {len(latency) / max(latency.sum() / 1000, 1e-9):.1f} frames/s over {len(latency)} frames")
+
+
+def check_labels(js, labels_path, imgsz):
+    """Replay each labeled clip through a fresh BR31 counter and compare jump counts."""
+    with open(labels_path) as f:
+        clips = json.load(f)
+    base = os.path.dirname(os.path.abspath(labels_path))
+    failures = 0
+    for clip in clips:
+        source = os.path.join(base, clip['source'])
+        counter = js.BR31Counter()
+        timings = replay(js, source, listeners=(counter.update,), imgsz=imgsz, fps=clip.get('fps'))
+        expected, tolerance = clip['jumps'], clip.get('tolerance', 0)
+        ok = abs(counter.jump_count - expected) <= tolerance
+        failures += not ok
+        print(f"{'PASS' if ok else 'FAIL'}  {clip['source']}: expected {expected}, "
+              f"counted {counter.jump_count} ({len(timings)} frames)")
+    print(f"{len(clips) - failures}/{len(clips)} clips within tolerance")
+    return failures == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Offline pipeline replay benchmark')
+    parser.add_argument('source', nargs='?', help='Video file, image directory or pose recording')
+    parser.add_argument('--labels', help='JSON file of clips with expected jump counts')
+    parser.add_argument('--feed', default='br31', choices=('main', 'jump_target', 'people', 'br31'))
+    parser.add_argument('--frames', type=int, help='Stop after this many frames')
+    parser.add_argument('--fps', type=float, help='Frame rate for sources without one (default: 30)')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--quality', type=int, default=80)
+    parser.add_argument('--width', type=int, help='Downscale streamed frames to this width')
+    args = parser.parse_args()
+    if not args.source and not args.labels:
+        parser.error('give a SOURCE to benchmark and/or --labels to check')
+    source = os.path.abspath(args.source) if args.source else None
+    labels = os.path.abspath(args.labels) if args.labels else None
+
+    # The server loads its sprites and model relative to the repository root
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import jump_server as js
+
+    # Keep the model's first, slow call out of the timings
+    if source and not js.is_pose_recording(source):
+        js.pose_model.warm_up(args.imgsz)
+        if js.pose_model.error:
+            sys.exit(f"Pose model failed to load: {js.pose_model.error}")
+
+    ok = True
+    if source:
+        feed = js.cameras[0].feeds[args.feed]
+        timings = replay(js, source, feed.listeners, feed.draw, args.quality, args.width,
+                         args.imgsz, args.frames, args.fps)
+        if not len(timings):
+            sys.exit(f"No frames could be read from {args.source}")
+        print(f"Source {args.source}, feed {args.feed}, imgsz {args.imgsz}")
+        report(timings)
+    if labels:
+        ok = check_labels(js, labels, args.imgsz)
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
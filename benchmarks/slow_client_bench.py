@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+How much stale video a stalled MJPEG client gets once it reads again.
+
+For each --server mode this starts jump_server.py on a generated video
+whose frames carry their index in the bottom-right corner, watches
+/video-feed/people, stops reading for --stall seconds and then counts the
+parts it reads before it is back at the live frame. Feeds drop frames for
+slow clients, so only what the server and the kernel's socket buffers held
+should arrive stale; a large backlog means the server queued parts for the
+client instead of dropping them.
+
+Usage:
+  python benchmarks/slow_client_bench.py [--servers waitress threaded] [--stall 5] [--max-backlog-mb 8]
+
+Exits with status 1 when a server's backlog is over --max-backlog-mb.
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import urllib.error
+import urllib.request
+
+import cv2
+import numpy as np
+
+from pipeline_bench import ROOT
+
+FPS = 30
+FRAME_SHAPE = (480, 640, 3)
+CODE_BLOCK = 32  # Pixels per side of each 4-bit block of the frame index
+CODE_BLOCKS = 4
+CLIENT_RECEIVE_BUFFER = 64 * 1024
+LIVE_FRAMES = 5  # A part this many frames behind or less counts as live
+
+
+def write_video(path, seconds):
+    """Noisy frames (realistic JPEG sizes) with the frame index coded in gray blocks."""
+    height, width = FRAME_SHAPE[:2]
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*'MJPG'), FPS, (width, height))
+    rng = np.random.default_rng(0)
+    noise = [rng.integers(0, 256, FRAME_SHAPE, dtype=np.uint8) for _ in range(8)]
+    for index in range(int(seconds * FPS)):
+        frame = noise[index % len(noise)].copy()
+        for block in range(CODE_BLOCKS):
+            nibble = (index >> (4 * block)) & 0xF
+            x = width - CODE_BLOCK * (block + 1)
+            frame[height - CODE_BLOCK:, x:x + CODE_BLOCK] = nibble * 16 + 8
+        writer.write(frame)
+    writer.release()
+
+
+def frame_index(jpeg):
+    frame = cv2.imdecode(np.frombuffer(jpeg, np.uint8), cv2.IMREAD_GRAYSCALE)
+    height, width = frame.shape
+    index = 0
+    inner = CODE_BLOCK // 4
+    for block in range(CODE_BLOCKS):
+        x = width - CODE_BLOCK * (block + 1)
+        patch = frame[height - CODE_BLOCK + inner:height - inner, x + inner:x + CODE_BLOCK - inner]
+        index |= int(np.clip(round((patch.mean() - 8) / 16), 0, 15)) << (4 * block)
+    return index
+
+
+class PartReader:
+    """Splits an HTTP/1.0 multipart JPEG response into parts."""
+
+    PART_START = b'Content-Type: image/jpeg\r\n\r\n'
+    BOUNDARY = b'\r\n--frame\r\n'
+
+    def __init__(self, sock):
+        self.sock = sock
+        self.buffer = bytearray()
+
+    def next_part(self):
+        """JPEG bytes of the next complete part."""
+        while True:
+            begin = self.buffer.find(self.PART_START)
+            if begin >= 0:
+                begin += len(self.PART_START)
+                end = self.buffer.find(self.BOUNDARY, begin)
+                if end >= 0:
+                    jpeg = bytes(self.buffer[begin:end])
+                    del self.buffer[:end]
+                    return jpeg
+            data = self.sock.recv(1 << 16)
+            if not data:
+                raise EOFError('stream ended')
+            self.buffer += data
+
+
+def wait_ready(port, timeout=120):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            with urllib.request.urlopen(f'http://127.0.0.1:{port}/healthz', timeout=1) as response:
+                if response.status == 200:
+                    return
+        except (urllib.error.URLError, ConnectionError, socket.timeout):
+            pass
+        time.sleep(0.5)
+    raise RuntimeError('server did not become ready')
+
+
+def measure(server, video, port, stall, imgsz):
+    """(stale parts, their bytes, frames the first of them lags behind) after the stall."""
+    process = subprocess.Popen([sys.executable, 'jump_server.py', '--server', server, '--port', str(port),
+                                '--host', '127.0.0.1', '--source', video, '--imgsz', str(imgsz)],
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        wait_ready(port)
+        sock = socket.socket()
+        # A fixed small receive buffer, so the kernel does not absorb the backlog on the client side
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, CLIENT_RECEIVE_BUFFER)
+        sock.connect(('127.0.0.1', port))
+        # HTTP/1.0 so neither server uses chunked encoding
+        sock.sendall(b'GET /video-feed/people HTTP/1.0\r\n\r\n')
+        reader = PartReader(sock)
+        # Reading normally first: the live frame advances at FPS from here
+        for _ in range(10):
+            start_index, start_time = frame_index(reader.next_part()), time.time()
+        time.sleep(stall)
+        parts = size = 0
+        first_lag = None
+        while True:
+            jpeg = reader.next_part()
+            lag = start_index + (time.time() - start_time) * FPS - frame_index(jpeg)
+            if first_lag is None:
+                first_lag = lag
+            if lag < LIVE_FRAMES:
+                break
+            parts += 1
+            size += len(jpeg)
+        sock.close()
+        return parts, size, first_lag
+    finally:
+        process.terminate()
+        process.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='MJPEG lag of a client that stops reading for a while')
+    parser.add_argument('--servers', nargs='+', default=['waitress', 'threaded'])
+    parser.add_argument('--stall', type=float, default=5.0, help='Seconds the client stops reading (default: 5)')
+    parser.add_argument('--max-backlog-mb', type=float, default=8.0, help='Stale MB that count as a failure')
+    parser.add_argument('--imgsz', type=int, default=320)
+    parser.add_argument('--port', type=int, default=5091)
+    args = parser.parse_args()
+
+    os.chdir(ROOT)
+    failed = False
+    with tempfile.TemporaryDirectory() as folder:
+        video = os.path.join(folder, 'numbered.avi')
+        # Long enough for startup, warm-up and the stall
+        write_video(video, args.stall + 60)
+        print(f"Stall {args.stall:g}s, {FRAME_SHAPE[1]}x{FRAME_SHAPE[0]} at {FPS} fps")
+        print(f"{'server':<9} {'stale_parts':>11} {'stale_mb':>8} {'first_lag_s':>11}")
+        for server in args.servers:
+            parts, size, first_lag = measure(server, video, args.port, args.stall, args.imgsz)
+            over = size / 1e6 > args.max_backlog_mb
+            failed |= over
+            print(f"{server:<9} {parts:11d} {size / 1e6:8.1f} {first_lag / FPS:11.2f}{'  FAIL' if over else ''}")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
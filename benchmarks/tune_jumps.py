@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Grid search over the jump detection settings against labeled clips.
+
+Each clip is replayed and tracked once; every combination of SYNC_WINDOW,
+JUMP_THRESHOLD and JUMP_END_TIMEOUT then only re-runs the BR31 counter on
+the cached detections, which takes milliseconds. Pose recordings (an .npz
+file or a directory written by `jump_server.py --record`) skip YOLO
+entirely; other clips run the pose model once up front.
+
+Usage:
+  python benchmarks/tune_jumps.py clips.json \\
+      --sync-window 0.15 0.25 0.35 --threshold 0.08 0.12 0.16 --end-timeout 1.5 2.5
+
+The labels file has the format described in pipeline_bench.py.
+"""
+
+import argparse
+import itertools
+import json
+import os
+import sys
+import time
+from dataclasses import replace
+
+from pipeline_bench import ROOT, replay
+
+
+def load_clips(js, labels_path, imgsz):
+    """[(name, expected jumps, tolerance, [PoseResult])] with frames dropped to save memory."""
+    with open(labels_path) as f:
+        clips = json.load(f)
+    base = os.path.dirname(labels_path)
+    loaded = []
+    for clip in clips:
+        results = []
+        collect = lambda result: results.append(replace(result, frame=None))  # noqa: E731
+        replay(js, os.path.join(base, clip['source']), listeners=(collect,), imgsz=imgsz, fps=clip.get('fps'))
+        loaded.append((clip['source'], clip['jumps'], clip.get('tolerance', 0), results))
+    return loaded
+
+
+def score(js, clips, sync_window, threshold, end_timeout):
+    """(clips within tolerance, total absolute count error) for one setting."""
+    passed = error = 0
+    for _, expected, tolerance, results in clips:
+        counter = js.BR31Counter(sync_window, end_timeout, threshold)
+        for result in results:
+            counter.update(result)
+        passed += abs(counter.jump_count - expected) <= tolerance
+        error += abs(counter.jump_count - expected)
+    return passed, error
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tune jump detection settings on labeled clips')
+    parser.add_argument('labels', help='JSON file of clips with expected jump counts')
+    parser.add_argument('--sync-window', type=float, nargs='+')
+    parser.add_argument('--threshold', type=float, nargs='+')
+    parser.add_argument('--end-timeout', type=float, nargs='+')
+    parser.add_argument('--imgsz', type=int, default=640)
+    parser.add_argument('--top', type=int, default=10, help='Number of settings to list')
+    args = parser.parse_args()
+    labels = os.path.abspath(args.labels)
+
+    os.chdir(ROOT)
+    sys.path.insert(0, ROOT)
+    import jump_server as js
+
+    sync_windows = args.sync_window or [js.SYNC_WINDOW]
+    thresholds = args.threshold or [js.JUMP_THRESHOLD]
+    end_timeouts = args.end_timeout or [js.JUMP_END_TIMEOUT]
+
+    start = time.perf_counter()
+    clips = load_clips(js, labels, args.imgsz)
+    print(f"Loaded {len(clips)} clips ({sum(len(c[3]) for c in clips)} frames) "
+          f"in {time.perf_counter() - start:.2f}s")
+
+    start = time.perf_counter()
+    scores = []
+    for setting in itertools.product(sync_windows, thresholds, end_timeouts):
+        scores.append((score(js, clips, *setting), setting))
+    elapsed = time.perf_counter() - start
+    print(f"Scored {len(scores)} settings in {elapsed:.2f}s ({elapsed / len(scores) * 1000:.1f} ms each)")
+
+    scores.sort(key=lambda item: (-item[0][0], item[0][1]))
+    print(f"{'sync_window':>11} {'threshold':>9} {'end_timeout':>11} {'passed':>7} {'error':>6}")
+    for (passed, error), (sync_window, threshold, end_timeout) in scores[:args.top]:
+        print(f"{sync_window:11.3f} {threshold:9.3f} {end_timeout:11.2f} {passed:>4}/{len(clips):<2} {error:6d}")
+
+
+if __name__ == '__main__':
+    main()
@@ -15,7 +15,7 @@ source venv/bin/activate
 
 # Install required packages
 echo "Installing Python packages..."
-pip install pyinstaller opencv-python ultralytics flask flask-cors argparse
+pip install pyinstaller opencv-python ultralytics onnx onnxruntime flask flask-cors waitress argparse
 
 # Build the executable
 echo "Building executable with PyInstaller..."
@@ -3,6 +3,7 @@
 Build script for creating platform-specific Python executables
 """
 
+import argparse
 import os
 import sys
 import subprocess
@@ -78,9 +79,12 @@ def install_packages():
         packages = [
             'flask',
             'flask-cors', 
+            'waitress',
             'opencv-python',
             'numpy',
             'ultralytics',
+            'onnx',
+            'onnxruntime',
             'PyInstaller'
         ]
         
@@ -106,8 +110,13 @@ def install_packages():
         
         print("✅ All packages installed successfully")
 
-def build_executable():
-    """Build the executable using PyInstaller"""
+def build_executable(onedir=False):
+    """Build the executable using PyInstaller
+    
+    A one-file build unpacks its whole bundle (torch included) to a temporary
+    directory on every launch; a one-folder build is unpacked once at install
+    time and starts several seconds faster.
+    """
     python_cmd = get_python_commands()
     if not python_cmd:
         raise RuntimeError("Python not found")
@@ -138,7 +147,7 @@ def build_executable():
     cmd = [
         python_cmd, '-m', 'PyInstaller',
         'jump_server.py',
-        '--onefile',
+        '--onedir' if onedir else '--onefile',
         '--distpath=dist',
         '--workpath=build', 
         '--specpath=.',
@@ -148,10 +157,19 @@ def build_executable():
         '--hidden-import=ultralytics',
         '--hidden-import=flask',
         '--hidden-import=flask_cors',
+        '--hidden-import=waitress',
         '--collect-all=ultralytics',
+        '--hidden-import=onnx',
+        '--collect-all=onnxruntime',
         '--noconfirm'
     ]
     
+    # OpenVINO is optional (--backend openvino); bundle it if it is installed
+    result = subprocess.run([python_cmd, '-c', 'import openvino'], capture_output=True)
+    if result.returncode == 0:
+        cmd.append('--collect-all=openvino')
+        print("✓ Including OpenVINO runtime")
+    
     # Add model file if it exists
     if os.path.exists('yolov8n-pose.pt'):
         cmd.append('--add-data=yolov8n-pose.pt:.')
@@ -166,14 +184,21 @@ def build_executable():
     
     # Check if the executable was created
     exe_name = 'jump_server.exe' if platform.system() == 'Windows' else 'jump_server'
-    exe_path = os.path.join('dist', exe_name)
+    # One-folder builds put the executable inside dist/jump_server/
+    exe_path = os.path.join('dist', 'jump_server', exe_name) if onedir else os.path.join('dist', exe_name)
     
     if os.path.exists(exe_path):
         print(f"✓ Executable created: {exe_path}")
         
         # Get file size
-        size_mb = os.path.getsize(exe_path) / (1024 * 1024)
-        print(f"✓ File size: {size_mb:.1f} MB")
+        if onedir:
+            folder = os.path.dirname(exe_path)
+            size = sum(os.path.getsize(os.path.join(root, name))
+                       for root, _, names in os.walk(folder) for name in names)
+            print(f"✓ Folder size: {size / (1024 * 1024):.1f} MB")
+        else:
+            size_mb = os.path.getsize(exe_path) / (1024 * 1024)
+            print(f"✓ File size: {size_mb:.1f} MB")
         
         # Make it executable on Unix systems
         if platform.system() != 'Windows':
@@ -186,12 +211,18 @@ def build_executable():
 
 def main():
     """Main build function"""
+    parser = argparse.ArgumentParser(description='Build the jump_server backend executable')
+    parser.add_argument('--onedir', action='store_true',
+                        help='Build a folder instead of a single file; starts faster because nothing is unpacked at launch')
+    args = parser.parse_args()
+    
     print("=" * 60)
     print("Building Python executable for Neulbom")
     print("=" * 60)
     print(f"Platform: {platform.system()} {platform.machine()}")
     print(f"Python version: {sys.version}")
     print(f"Working directory: {os.getcwd()}")
+    print(f"Layout: {'one folder' if args.onedir else 'one file'}")
     print()
     
     try:
@@ -202,7 +233,7 @@ def main():
         
         # Build executable
         print("Step 2: Building executable...")
-        exe_path = build_executable()
+        exe_path = build_executable(args.onedir)
         print()
         
         print("=" * 60)
@@ -31,44 +31,62 @@ function setup() {
 let lastJumpCount = 0;
 let lastJumpTime = 0;
 let jumpTimeout = null;
+let latestJumpCount = 0;
+let jumpEvents = null;
 
 function pollJumpCount() {
   if (!window.jumpPollingActive || br31GameOver || br31CurrentPlayer !== 1) return;
+  // With the event stream connected, jump counts arrive as they change
+  if (jumpEvents && jumpEvents.readyState === EventSource.OPEN) {
+    handleJumpCount(latestJumpCount);
+    return;
+  }
   fetch('http://localhost:5001/jump_count')
     .then(res => res.json())
-    .then(data => {
-      const jumpCount = data.count || 0;
-      // If jump count increases, update lastJumpTime
-      if (jumpCount > 0) {
-        if (jumpCount !== lastJumpCount) {
-          lastJumpTime = Date.now();
-          select('#br31-jumpstatus').html('점프 감지: ' + jumpCount + '회');
-        }
-      } else {
-        select('#br31-jumpstatus').html('');
-      }
-      // If jump count is nonzero and hasn't changed for 2 seconds, apply the move
-      if (jumpCount > 0 && Date.now() - lastJumpTime > 2000) {
-        let add = Math.min(jumpCount, 3);
-        for (let i = br31Current; i < br31Current + add; i++) {
-          br31Owners[i] = 1;
-        }
-        br31Current += add;
-        br31LastMove = add;
-        if (br31Current === 31) {
-          br31GameOver = true;
-        } else {
-          br31CurrentPlayer = 2;
-          setTimeout(computerMove, 700);
-        }
-        // Reset jump count on backend
-        fetch('http://localhost:5001/reset_jump_count', { method: 'POST' });
-        lastJumpCount = 0;
-        select('#br31-jumpstatus').html('');
-      } else {
-        lastJumpCount = jumpCount;
-      }
-    });
+    .then(data => handleJumpCount(data.count || 0));
+}
+
+function startJumpEvents() {
+  if (!window.EventSource || jumpEvents) return;
+  // poseStream.js (loaded by br31.html) shares one /events connection with the pose overlay
+  jumpEvents = typeof poseEvents === 'function' ? poseEvents() : new EventSource('http://localhost:5001/events');
+  jumpEvents.addEventListener('jump', (event) => {
+    latestJumpCount = JSON.parse(event.data).count || 0;
+  });
+}
+
+function handleJumpCount(jumpCount) {
+  // If jump count increases, update lastJumpTime
+  if (jumpCount > 0) {
+    if (jumpCount !== lastJumpCount) {
+      lastJumpTime = Date.now();
+      select('#br31-jumpstatus').html('점프 감지: ' + jumpCount + '회');
+    }
+  } else {
+    select('#br31-jumpstatus').html('');
+  }
+  // If jump count is nonzero and hasn't changed for 2 seconds, apply the move
+  if (jumpCount > 0 && Date.now() - lastJumpTime > 2000) {
+    let add = Math.min(jumpCount, 3);
+    for (let i = br31Current; i < br31Current + add; i++) {
+      br31Owners[i] = 1;
+    }
+    br31Current += add;
+    br31LastMove = add;
+    if (br31Current === 31) {
+      br31GameOver = true;
+    } else {
+      br31CurrentPlayer = 2;
+      setTimeout(computerMove, 700);
+    }
+    // Reset jump count on backend
+    fetch('http://localhost:5001/reset_jump_count', { method: 'POST' });
+    lastJumpCount = 0;
+    latestJumpCount = 0;
+    select('#br31-jumpstatus').html('');
+  } else {
+    lastJumpCount = jumpCount;
+  }
 }
 
 function draw() {
@@ -135,6 +153,7 @@ function draw() {
   // Start polling for jumps if it's the user's turn
   if (!window.jumpPollingActive && !br31GameOver && br31CurrentPlayer === 1) {
     window.jumpPollingActive = true;
+    startJumpEvents();
     setInterval(pollJumpCount, 300);
   }
 }
@@ -0,0 +1,233 @@
+// poseStream.js - draws the jump server's detections over the local camera.
+//
+// Instead of downloading annotated MJPEG frames, the page shows the camera
+// in a <video> element and reads only the poses from /keypoints, a binary
+// stream of a few KB/s. The page opens the same device as the server's camera
+// (the X-Camera-Device header), and only once the server's capture is
+// running, so where cameras are exclusive (often on Windows) the page simply
+// fails to open it. If the camera or the stream is not available, the
+// original <img> keeps showing the server's MJPEG feed. Either way the feed
+// is only loaded once the backend reports ready (checkBackendReady).
+//
+// Usage: <img id="cam" src="http://localhost:5001/video-feed-369" ...>
+//        <script src="poseStream.js"></script>
+//        <script>startPoseOverlay(document.getElementById('cam'), { game: 'people' });</script>
+
+const POSE_SERVER = 'http://localhost:5001';
+const POSE_HEADER_BYTES = 24; // See KEYPOINT_HEADER in jump_server.py
+const POSE_VALUES = 38; // Box x1, y1, x2, y2, then x, y of 17 keypoints
+const POSE_VIDEO_START_TIMEOUT = 5000; // ms for the local camera to start playing
+const POSE_READY_POLL = 500; // ms between backend readiness checks
+
+// The text each game's render() draws on the MJPEG feed: [text, x, y, color]
+// in frame pixels, like cv2.putText at font scale 2
+const POSE_HUD = {
+  people: (message) => [[`People: ${message.people.length}`, 50, 80, '#ff0000']],
+  br31: (message, state) => [
+    [`People: ${message.people.length}`, 50, 80, '#ff0000'],
+    [`Jumps: ${state.jumps}`, 50, 150, '#ff00ff'],
+  ],
+};
+
+// float16 -> number; Float16Array is not available in every Electron version
+function halfToFloat(bits) {
+  const exponent = (bits >> 10) & 0x1f;
+  const fraction = bits & 0x3ff;
+  const sign = bits & 0x8000 ? -1 : 1;
+  if (exponent === 0) return sign * Math.pow(2, -14) * (fraction / 1024);
+  if (exponent === 0x1f) return fraction ? NaN : sign * Infinity;
+  return sign * Math.pow(2, exponent - 15) * (1 + fraction / 1024);
+}
+
+// Parse one message at `offset` of `bytes`, or return null if it is not complete yet
+function parsePoseMessage(bytes, offset) {
+  if (bytes.length - offset < POSE_HEADER_BYTES) return null;
+  const view = new DataView(bytes.buffer, bytes.byteOffset + offset);
+  const length = view.getUint32(0, true);
+  if (bytes.length - offset < POSE_HEADER_BYTES + length) return null;
+  const people = view.getUint16(20, true);
+  const message = {
+    size: POSE_HEADER_BYTES + length,
+    frameId: view.getUint32(4, true),
+    timestamp: view.getFloat64(8, true),
+    width: view.getUint16(16, true),
+    height: view.getUint16(18, true),
+    people: [],
+  };
+  const valuesStart = POSE_HEADER_BYTES + people * 4;
+  for (let i = 0; i < people; i++) {
+    const values = [];
+    for (let j = 0; j < POSE_VALUES; j++) {
+      values.push(halfToFloat(view.getUint16(valuesStart + (i * POSE_VALUES + j) * 2, true)));
+    }
+    const keypoints = [];
+    for (let k = 4; k < POSE_VALUES; k += 2) keypoints.push([values[k], values[k + 1]]);
+    message.people.push({
+      trackId: view.getInt32(POSE_HEADER_BYTES + i * 4, true),
+      box: values.slice(0, 4),
+      keypoints: keypoints,
+    });
+  }
+  return message;
+}
+
+// Same marks as the server's draw_detections: green keypoints, blue boxes,
+// then the game's text
+function drawPoses(ctx, message, hud) {
+  const canvas = ctx.canvas;
+  ctx.clearRect(0, 0, canvas.width, canvas.height);
+  const sx = canvas.width / message.width;
+  const sy = canvas.height / message.height;
+  for (const person of message.people) {
+    ctx.fillStyle = '#00ff00';
+    for (const [x, y] of person.keypoints) {
+      if (x === 0 && y === 0) continue; // Not detected
+      ctx.beginPath();
+      ctx.arc(x * sx, y * sy, 3, 0, 2 * Math.PI);
+      ctx.fill();
+    }
+    const [x1, y1, x2, y2] = person.box;
+    ctx.strokeStyle = '#0000ff';
+    ctx.lineWidth = 2;
+    ctx.strokeRect(x1 * sx, y1 * sy, (x2 - x1) * sx, (y2 - y1) * sy);
+  }
+  ctx.font = `bold ${Math.round(60 * sy)}px sans-serif`;
+  for (const [text, x, y, color] of hud) {
+    ctx.fillStyle = color;
+    ctx.fillText(text, x * sx, y * sy);
+  }
+}
+
+async function readPoseStream(response, onMessage) {
+  const reader = response.body.getReader();
+  let pending = new Uint8Array(0);
+  while (true) {
+    const { done, value } = await reader.read();
+    if (done) throw new Error('Keypoint stream ended');
+    const bytes = new Uint8Array(pending.length + value.length);
+    bytes.set(pending);
+    bytes.set(value, pending.length);
+    let offset = 0;
+    let message;
+    while ((message = parsePoseMessage(bytes, offset)) !== null) {
+      onMessage(message);
+      offset += message.size;
+    }
+    pending = bytes.slice(offset);
+  }
+}
+
+// One /events connection per server camera for the whole page: the overlay
+// and the game scripts add their own listeners to it rather than each opening one
+const poseEventSources = {};
+
+function poseEvents(cam = 0) {
+  if (!poseEventSources[cam]) poseEventSources[cam] = new EventSource(POSE_SERVER + '/events?cam=' + cam);
+  return poseEventSources[cam];
+}
+
+// Resolve once main.js has seen the backend's /healthz succeed (the model is
+// warmed up), report an error or the backend exit, or right away outside Electron
+async function whenPoseServerReady() {
+  const api = window.electron;
+  if (!api || !api.checkBackendReady) return;
+  while (!(await api.checkBackendReady())) {
+    await new Promise((resolve) => setTimeout(resolve, POSE_READY_POLL));
+  }
+}
+
+// The local camera with the same index as the server's camera `device`
+async function localCameraId(device) {
+  const cameras = (await navigator.mediaDevices.enumerateDevices()).filter((d) => d.kind === 'videoinput');
+  if (device >= cameras.length || !cameras[device].deviceId) throw new Error('No local camera ' + device);
+  return cameras[device].deviceId;
+}
+
+function whenPlaying(video) {
+  return new Promise((resolve, reject) => {
+    video.addEventListener('playing', resolve, { once: true });
+    setTimeout(() => reject(new Error('Local camera did not start playing')), POSE_VIDEO_START_TIMEOUT);
+    video.play().catch(reject);
+  });
+}
+
+// Replace the MJPEG <img> with the local camera plus a skeleton canvas.
+// options.game keeps that game's logic running on the server (e.g. 'br31')
+// and picks the text drawn over the video, options.cam picks the server camera.
+async function startPoseOverlay(img, options = {}) {
+  const mjpegSrc = img.src;
+  // An <img> that cannot connect yet never retries, so load the feed once the backend is ready
+  img.removeAttribute('src');
+  await whenPoseServerReady();
+  img.src = mjpegSrc;
+  const cam = options.cam || 0;
+  const params = new URLSearchParams({ cam: cam });
+  if (options.game) params.set('game', options.game);
+  const hud = POSE_HUD[options.game] || (() => []);
+  const state = { jumps: 0 };
+  const abort = new AbortController();
+  const onJump = (event) => { state.jumps = JSON.parse(event.data).count; };
+  let events = null;
+  let stream = null;
+  let holder = null;
+  try {
+    const response = await fetch(POSE_SERVER + '/keypoints?' + params, { signal: abort.signal });
+    if (!response.ok || !response.body) throw new Error('Keypoint stream unavailable: ' + response.status);
+    const device = response.headers.get('X-Camera-Device');
+    if (device === null) throw new Error('The server camera is not a local device');
+
+    let draw = null;
+    let firstPose;
+    const posesArriving = new Promise((resolve) => { firstPose = resolve; });
+    const streaming = readPoseStream(response, (message) => {
+      firstPose();
+      if (draw) draw(message);
+    });
+    streaming.catch(() => {}); // Awaited below; this only silences it once the overlay has given up
+    // The server has the camera open once poses arrive; only then try to share it
+    await Promise.race([posesArriving, streaming]);
+    const deviceId = await localCameraId(Number(device));
+    stream = await navigator.mediaDevices.getUserMedia({ video: { deviceId: { exact: deviceId } }, audio: false });
+
+    const video = document.createElement('video');
+    video.muted = true;
+    video.playsInline = true;
+    video.srcObject = stream;
+    video.width = img.width;
+    video.height = img.height;
+    await Promise.race([whenPlaying(video), streaming]);
+
+    const canvas = document.createElement('canvas');
+    canvas.width = img.width;
+    canvas.height = img.height;
+    canvas.style.position = 'absolute';
+    canvas.style.left = '0';
+    canvas.style.top = '0';
+    holder = document.createElement('div');
+    holder.style.cssText = img.style.cssText;
+    holder.style.position = 'relative';
+    holder.style.width = img.width + 'px';
+    holder.style.height = img.height + 'px';
+    holder.appendChild(video);
+    holder.appendChild(canvas);
+
+    if (options.game === 'br31') {
+      events = poseEvents(cam);
+      events.addEventListener('jump', onJump);
+    }
+    // The video is playing: stop the MJPEG download and draw the poses locally
+    img.replaceWith(holder);
+    img.removeAttribute('src');
+    const ctx = canvas.getContext('2d');
+    draw = (message) => drawPoses(ctx, message, hud(message, state));
+    await streaming;
+  } catch (error) {
+    console.warn('Pose overlay unavailable, using the MJPEG feed:', error);
+    abort.abort();
+    // Shared with the page's game script, so only stop listening
+    if (events) events.removeEventListener('jump', onJump);
+    if (stream) stream.getTracks().forEach((track) => track.stop());
+    if (holder && holder.parentElement) holder.replaceWith(img);
+    if (!img.getAttribute('src')) img.src = mjpegSrc;
+  }
+}
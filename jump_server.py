@@ -1,102 +1,2792 @@
+import time
+STARTUP_BEGIN = time.time()  # Before the other imports, so the startup report includes them
 import signal
 import sys
 import logging
 from flask import Flask, send_file, Response, jsonify, request
+from werkzeug.debug import DebuggedApplication
+from werkzeug.serving import BaseWSGIServer, make_server
 import subprocess
 import threading
+import importlib.util
+import multiprocessing
+import multiprocessing.connection
+from multiprocessing import shared_memory
+from concurrent.futures import Future
+from contextlib import ExitStack, contextmanager
+from functools import partial
+from collections import deque
+from dataclasses import asdict, dataclass, field, replace
 import cv2
 import os
+import json
+import queue
+import struct
+import hashlib
+import shutil
+import tempfile
 import numpy as np
-import time
 import random
-from ultralytics import YOLO
 from flask_cors import CORS
-from PIL import Image, ImageSequence
+# ultralytics (with torch) and PIL are imported where first used, so the port binds in well under a second
+IMPORTS_DONE = time.time()
+
+# Configure logging to avoid stdout/stderr issues
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s',
+    handlers=[
+        logging.StreamHandler(sys.stdout)
+    ]
+)
+
+# Set up logger with error handling
+logger = logging.getLogger(__name__)
+
+# Custom handler to prevent EPIPE errors
+class SafeStreamHandler(logging.StreamHandler):
+    def emit(self, record):
+        try:
+            super().emit(record)
+        except (BrokenPipeError, OSError) as e:
+            # Silently ignore broken pipe errors during shutdown
+            if e.errno != 32:  # EPIPE
+                raise
+
+# Replace the default handler with our safe one
+logger.handlers.clear()
+safe_handler = SafeStreamHandler(sys.stdout)
+safe_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
+logger.addHandler(safe_handler)
+logger.setLevel(logging.INFO)
+
+# Set when the server is told to stop, so open streams end instead of holding up shutdown
+shutdown_event = threading.Event()
+STREAM_SHUTDOWN_POLL = 0.5  # Seconds between shutdown checks of idle event streams
+
+
+# Signal handler for graceful shutdown
+def signal_handler(signum, frame):
+    logger.info(f"Received signal {signum}, shutting down...")
+    shutdown_event.set()
+    sys.exit(0)
+
+signal.signal(signal.SIGTERM, signal_handler)
+signal.signal(signal.SIGINT, signal_handler)
+
+# Startup report
+class StartupReport:
+    """When each startup milestone was reached and how long each startup step took.
+
+    Milestones are seconds since the interpreter began importing this module;
+    steps are durations of their first successful run, and steps that raised
+    are listed under 'failed' with their error. The report is served at /startup
+    and logged once the first pose result is out, so a slow start can be
+    traced to imports, the ultralytics import, model loading, warm-up or the
+    camera. Time a frozen build spends unpacking before Python starts is not
+    included; main.js logs the launch-to-ready time that covers it.
+    """
+
+    def __init__(self, begin):
+        self.begin = begin
+        self._lock = threading.Lock()
+        self._milestones = {}  # name -> seconds since begin
+        self._steps = {}  # name -> seconds
+        self._failed = {}  # name -> error message
+
+    def milestone(self, name, when=None):
+        with self._lock:
+            if name in self._milestones:
+                return
+            self._milestones[name] = round((when or time.time()) - self.begin, 3)
+        if name == 'first_result':
+            logger.info(f"Startup: {self.as_dict()}")
+
+    @contextmanager
+    def step(self, name):
+        start = time.time()
+        try:
+            yield
+        except Exception as e:
+            with self._lock:
+                self._failed.setdefault(name, str(e))
+            raise
+        with self._lock:
+            self._steps.setdefault(name, round(time.time() - start, 3))
+
+    def as_dict(self):
+        with self._lock:
+            return {'milestones': dict(self._milestones), 'steps': dict(self._steps), 'failed': dict(self._failed)}
+
+
+startup = StartupReport(STARTUP_BEGIN)
+startup.milestone('imports', IMPORTS_DONE)
+
+# After you create your Flask app:
+app = Flask(__name__, static_folder='.', static_url_path='')
+CORS(app)
+
+# Jump detection settings shared by the jump games
+SYNC_WINDOW = 0.25
+JUMP_THRESHOLD = 0.12  # Rise above standing height that starts a jump, in body heights
+JUMP_MIN_VELOCITY = 0.6  # Upward speed that starts a jump, in body heights per second
+JUMP_END_TIMEOUT = 2.5
+
+# Koala GIF animation settings
+koala_frames = []  # KoalaFrame per GIF frame
+FRAME_DELAY = 0.08  # 80ms between frames for smoother animation
+KOALA_ALPHA_BOOST = 1.2  # Stronger alpha for better visibility
+KOALA_SPRITE_SIZES = (160, 240, 320, 400)  # Pre-scaled square sprite sizes in pixels
+KOALA_HEIGHT_FRACTION = 0.6  # Koala size relative to the frame height
+
+
+@dataclass
+class Sprite:
+    """BGR sprite with its alpha baked in, ready to blend without per-frame work.
+
+    The pixels are uint8 (4 bytes per pixel). The float32 blend weights and
+    the mirrored copy are built the first time a size is drawn and kept, so
+    drawing allocates nothing; crops are views.
+    """
+    bgr: np.ndarray    # (H, W, 3) uint8
+    alpha: np.ndarray  # (H, W) uint8, boosted alpha, 255 = opaque
+    _weights: tuple = field(default=None, init=False, repr=False, compare=False)
+    _mirrored: 'Sprite' = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def shape(self):
+        return self.bgr.shape
+
+    @classmethod
+    def from_rgba(cls, rgba, alpha_boost=1.0):
+        bgr = np.ascontiguousarray(cv2.cvtColor(rgba, cv2.COLOR_RGBA2BGR))
+        alpha = np.clip(rgba[:, :, 3].astype(np.float32) * alpha_boost, 0, 255).round().astype(np.uint8)
+        return cls(bgr=bgr, alpha=alpha)
+
+    def weights(self):
+        """(alpha / 255, 1 - alpha / 255) as float32, the per-pixel weights cv2.blendLinear takes."""
+        if self._weights is None:
+            weight = np.multiply(self.alpha, np.float32(1 / 255), dtype=np.float32)
+            self._weights = (weight, np.subtract(np.float32(1), weight))
+        return self._weights
+
+    def crop(self, x0, y0, x1, y1):
+        """Sub-rectangle of the sprite as views, without copying pixels."""
+        sprite = Sprite(bgr=self.bgr[y0:y1, x0:x1], alpha=self.alpha[y0:y1, x0:x1])
+        sprite._weights = tuple(weight[y0:y1, x0:x1] for weight in self.weights())
+        return sprite
+
+    def flipped(self):
+        """Mirrored sprite, copied once into contiguous arrays (blending through
+        negative strides is slower than the copy) and kept."""
+        if self._mirrored is None:
+            mirrored = Sprite(bgr=cv2.flip(self.bgr, 1), alpha=cv2.flip(self.alpha, 1))
+            mirrored._weights = tuple(cv2.flip(weight, 1) for weight in self.weights())
+            mirrored._mirrored = self
+            self._mirrored = mirrored
+        return self._mirrored
+
+
+def blend_sprite(roi, sprite):
+    """Alpha-blend `sprite` into `roi` (same shape) in place."""
+    # A single-channel weight per pixel, applied to B, G and R alike
+    weight, inverse = sprite.weights()
+    cv2.blendLinear(sprite.bgr, roi, weight, inverse, dst=roi)
+
+
+def blit_sprite(frame, sprite, x, y):
+    """Blend `sprite` with its top-left corner at (x, y), clipping whatever falls outside the frame."""
+    height, width = sprite.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + width, frame.shape[1]), min(y + height, frame.shape[0])
+    if x0 >= x1 or y0 >= y1:
+        return
+    blend_sprite(frame[y0:y1, x0:x1], sprite.crop(x0 - x, y0 - y, x1 - x, y1 - y))
+
+
+def koala_sprite_size(frame_height):
+    """Pre-scaled koala size closest to KOALA_HEIGHT_FRACTION of the frame height."""
+    target = frame_height * KOALA_HEIGHT_FRACTION
+    return min(KOALA_SPRITE_SIZES, key=lambda size: abs(size - target))
+
+
+class KoalaFrame:
+    """One GIF frame, scaled to every sprite size up front.
+
+    Built in the loader thread, so drawing never pays for a LANCZOS resize;
+    the four sizes take about 1.4 MB per GIF frame.
+    """
+
+    def __init__(self, image):
+        from PIL import Image
+        # image: PIL RGBA image
+        self._sprites = {size: Sprite.from_rgba(np.array(image.resize((size, size), Image.Resampling.LANCZOS)),
+                                                KOALA_ALPHA_BOOST)
+                         for size in KOALA_SPRITE_SIZES}
+
+    def sprite(self, size, mirrored=False):
+        sprite = self._sprites[size]
+        return sprite.flipped() if mirrored else sprite
+
+
+# Load the koala GIF frames once when the server starts
+def load_koala_frames():
+    try:
+        with startup.step('koala_frames'):
+            from PIL import Image, ImageSequence
+            gif_path = 'KakaoTalk_Photo_2025-07-17-13-41-48.gif'
+            gif = Image.open(gif_path)
+            frames = [KoalaFrame(frame.convert('RGBA')) for frame in ImageSequence.Iterator(gif)]
+        # Swapped in whole; the overlay draws nothing until then
+        koala_frames[:] = frames
+        logger.info(f"Loaded {len(koala_frames)} koala GIF frames")
+    except Exception as e:
+        logger.error(f"Failed to load koala GIF: {e}")
+
+# Decode in the background when the server starts; inference worker processes never draw
+if multiprocessing.parent_process() is None:
+    threading.Thread(target=load_koala_frames, name='koala-loader', daemon=True).start()
+
+
+# Metrics and tracing
+METRIC_PREFIX = 'jump_server_'
+METRIC_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)  # Seconds
+BATCH_SIZE_BUCKETS = (1, 2, 3, 4, 6, 8, 12, 16)  # Frames
+METRICS_MIMETYPE = 'text/plain; version=0.0.4; charset=utf-8'
+TRACE_MAX_EVENTS = 200000  # Oldest trace events are dropped beyond this
+
+
+def _format_labels(labels):
+    if not labels:
+        return ''
+    return '{' + ','.join(f'{key}="{value}"' for key, value in labels) + '}'
+
+
+class Counter:
+    """Monotonic count per label set, in Prometheus text exposition format."""
+
+    kind = 'counter'
+
+    def __init__(self, name, help):
+        self.name = METRIC_PREFIX + name
+        self.help = help
+        self._lock = threading.Lock()
+        self._values = {}  # sorted label items -> value
+
+    def inc(self, amount=1, **labels):
+        key = tuple(sorted(labels.items()))
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels):
+        with self._lock:
+            return self._values.get(tuple(sorted(labels.items())), 0)
+
+    def samples(self):
+        with self._lock:
+            return [(self.name, key, value) for key, value in self._values.items()]
+
+
+class Gauge(Counter):
+    """Value that goes up and down, such as the number of connected clients."""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[tuple(sorted(labels.items()))] = value
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram:
+    """Cumulative bucket counts, sum and count of observed values per label set."""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, buckets=METRIC_BUCKETS):
+        self.name = METRIC_PREFIX + name
+        self.help = help
+        self.buckets = np.asarray(buckets, dtype=np.float64)
+        self._lock = threading.Lock()
+        self._values = {}  # sorted label items -> [bucket counts, sum, count]
+
+    def observe(self, value, **labels):
+        key = tuple(sorted(labels.items()))
+        index = int(np.searchsorted(self.buckets, value))
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = [np.zeros(len(self.buckets) + 1, np.int64), 0.0, 0]
+            entry[0][index] += 1
+            entry[1] += value
+            entry[2] += 1
+
+    def samples(self):
+        samples = []
+        with self._lock:
+            for key, (counts, total, count) in self._values.items():
+                cumulative = np.cumsum(counts)
+                for bound, bucket_count in zip(list(self.buckets) + ['+Inf'], cumulative):
+                    le = bound if bound == '+Inf' else f'{bound:g}'
+                    samples.append((self.name + '_bucket', key + (('le', le),), int(bucket_count)))
+                samples.append((self.name + '_sum', key, total))
+                samples.append((self.name + '_count', key, count))
+        return samples
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._metrics = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{_format_labels(labels)} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+class FrameTracer:
+    """Per-frame stage timings in Chrome trace format (chrome://tracing, Perfetto).
+
+    Off by default and switched on at runtime through /trace; while off,
+    recording an event costs one attribute check.
+    """
+
+    def __init__(self, max_events=TRACE_MAX_EVENTS):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self._events = deque(maxlen=max_events)
+        self._threads = {}
+
+    def set_enabled(self, enabled):
+        with self._lock:
+            if enabled and not self.enabled:
+                self._events.clear()
+            self.enabled = enabled
+
+    def add(self, name, start, duration, **args):
+        if not self.enabled:
+            return
+        thread = threading.current_thread()
+        with self._lock:
+            self._threads[thread.ident] = thread.name
+            self._events.append({'name': name, 'ph': 'X', 'ts': start * 1e6, 'dur': duration * 1e6,
+                                 'pid': os.getpid(), 'tid': thread.ident, 'args': args})
+
+    def dump(self):
+        with self._lock:
+            names = [{'name': 'thread_name', 'ph': 'M', 'pid': os.getpid(), 'tid': ident, 'args': {'name': name}}
+                     for ident, name in self._threads.items()]
+            return {'traceEvents': names + list(self._events), 'displayTimeUnit': 'ms'}
+
+
+metrics = MetricsRegistry()
+frame_tracer = FrameTracer()
+stage_seconds = metrics.register(Histogram('stage_seconds', 'Time spent in each pipeline stage'))
+frame_latency_seconds = metrics.register(Histogram('frame_latency_seconds', 'Capture to pose result time per frame'))
+frames_captured = metrics.register(Counter('frames_captured_total', 'Frames read from the capture source'))
+camera_read_failures = metrics.register(Counter('camera_read_failures_total', 'Failed capture source reads'))
+frames_dropped = metrics.register(Counter('frames_dropped_total', 'Frames skipped because a consumer fell behind'))
+inferences = metrics.register(Counter('inferences_total', 'Pose model calls'))
+batch_size = metrics.register(Histogram('inference_batch_size', 'Frames per batched pose model call',
+                                        BATCH_SIZE_BUCKETS))
+batch_wait_seconds = metrics.register(Histogram('inference_batch_wait_seconds',
+                                                'Time frames waited for a batch to fill'))
+stream_clients = metrics.register(Gauge('stream_clients', 'Connected MJPEG clients per feed'))
+event_clients = metrics.register(Gauge('event_clients', 'Connected server-sent event clients'))
+keypoint_clients = metrics.register(Gauge('keypoint_clients', 'Connected binary keypoint stream clients per game'))
+
+
+@contextmanager
+def timed(stage, **trace_args):
+    """Record the duration of the enclosed block in stage_seconds and the frame trace."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        stage_seconds.observe(duration, stage=stage)
+        frame_tracer.add(stage, start, duration, **trace_args)
+
+
+# Pose recordings
+RECORDING_POSES = 'poses.f32'  # float32 rows of box xyxy + 17 keypoint xy, one per person
+RECORDING_INDEX = 'index.f64'  # float64 rows of (timestamp, first pose row, people), one per frame
+RECORDING_META = 'meta.json'
+RECORDING_COLUMNS = 4 + 17 * 2
+RECORDING_FLUSH_EVERY = 30  # Frames between flushes to disk
+
+
+@dataclass
+class PoseRecording:
+    """Timestamped detections of a recorded session, one entry per frame."""
+    timestamps: np.ndarray  # (F,)
+    starts: np.ndarray      # (F,) first row of each frame in boxes/keypoints
+    counts: np.ndarray      # (F,) people per frame
+    boxes: np.ndarray       # (P, 4) xyxy
+    keypoints: np.ndarray   # (P, 17, 2) xy
+    frame_shape: tuple = None
+
+    @property
+    def frames(self):
+        return len(self.timestamps)
+
+    def poses(self, index):
+        """(boxes, keypoints) of frame `index`."""
+        start, end = self.starts[index], self.starts[index] + self.counts[index]
+        return self.boxes[start:end], self.keypoints[start:end]
+
+
+def _memmap_rows(path, dtype, columns):
+    rows = os.path.getsize(path) // (np.dtype(dtype).itemsize * columns)
+    if rows == 0:
+        return np.zeros((0, columns), dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(rows, columns))
+
+
+def load_pose_recording(path):
+    """Load a PoseRecorder directory (memory-mapped) or an .npz file.
+
+    An .npz holds `timestamps` (F,), per-frame `counts` (F,), the
+    concatenated `boxes` (sum(counts), 4) and `keypoints` (sum(counts), 17, 2)
+    and optionally `frame_shape`.
+    """
+    if os.path.isdir(path):
+        poses = _memmap_rows(os.path.join(path, RECORDING_POSES), np.float32, RECORDING_COLUMNS)
+        index = _memmap_rows(os.path.join(path, RECORDING_INDEX), np.float64, 3)
+        starts, counts = index[:, 1].astype(np.int64), index[:, 2].astype(np.int64)
+        # A recording cut short may end with a frame whose poses never reached the disk
+        complete = starts + counts <= len(poses)
+        meta_path = os.path.join(path, RECORDING_META)
+        frame_shape = None
+        if os.path.exists(meta_path):
+            with open(meta_path) as f:
+                frame_shape = tuple(json.load(f).get('frame_shape', ())) or None
+        return PoseRecording(np.asarray(index[complete, 0]), starts[complete], counts[complete],
+                             poses[:, :4], poses[:, 4:].reshape(-1, 17, 2), frame_shape)
+    with np.load(path) as data:
+        counts = data['counts'].astype(np.int64)
+        return PoseRecording(data['timestamps'].astype(np.float64), np.cumsum(counts) - counts, counts,
+                             data['boxes'].astype(np.float32), data['keypoints'].astype(np.float32),
+                             tuple(data['frame_shape']) if 'frame_shape' in data else None)
+
+
+class PoseRecorder:
+    """Appends the pose model's detections to a recording directory.
+
+    Poses and the per-frame index are flat binary files that only grow, so a
+    session is recorded without buffering it and loaded back with np.memmap.
+    Use `record` as a pipeline listener.
+    """
+
+    def __init__(self, path):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._poses = open(os.path.join(path, RECORDING_POSES), 'ab')
+        self._index = open(os.path.join(path, RECORDING_INDEX), 'ab')
+        self._rows = self._poses.tell() // (RECORDING_COLUMNS * 4)
+        self._frames = 0
+        self._has_meta = os.path.exists(os.path.join(path, RECORDING_META))
+
+    def record(self, result):
+        """Append `result` unless its detections were carried over from an earlier frame."""
+        if not result.inferred:
+            return
+        rows = np.empty((result.people, RECORDING_COLUMNS), np.float32)
+        rows[:, :4] = result.boxes
+        rows[:, 4:] = result.keypoints.reshape(result.people, RECORDING_COLUMNS - 4)
+        with self._lock:
+            if self._poses.closed:
+                return
+            if not self._has_meta:
+                with open(os.path.join(self.path, RECORDING_META), 'w') as f:
+                    json.dump({'frame_shape': list(result.frame.shape)}, f)
+                self._has_meta = True
+            self._poses.write(rows.tobytes())
+            self._index.write(np.array([result.timestamp, self._rows, result.people], np.float64).tobytes())
+            self._rows += result.people
+            self._frames += 1
+            if self._frames % RECORDING_FLUSH_EVERY == 0:
+                self._poses.flush()
+                self._index.flush()
+
+    def close(self):
+        with self._lock:
+            self._poses.close()
+            self._index.close()
+
+
+# Capture sources
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.bmp')
+REPLAY_DEFAULT_FPS = 30.0
+REPLAY_FRAME_SHAPE = (480, 640, 3)  # Blank frame size for keypoint recordings without one
+
+
+class SystemClock:
+    """Wall-clock time, used for live capture."""
+
+    def now(self):
+        return time.time()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class ReplayClock:
+    """Deterministic clock that only moves when the replay advances it.
+
+    Timing-dependent game logic (sync windows, round timers) then gives the
+    same answer on every run, however fast the machine processes frames.
+    """
+
+    def __init__(self, start=0.0):
+        self._now = start
+
+    def now(self):
+        return self._now
+
+    def sleep(self, seconds):
+        self._now += max(0.0, seconds)
+
+    def advance_to(self, timestamp):
+        self._now = max(self._now, timestamp)
+
+
+class CaptureSource:
+    """Frame source read like cv2.VideoCapture: isOpened(), read() -> (ok, frame), release().
+
+    `fps` is the nominal frame rate of recorded sources (None for a live
+    camera). Sources that carry recorded detections set `poses` to the
+    (boxes, keypoints) of the last frame read and `timestamp` to its
+    recorded time.
+    """
+
+    fps = None
+    poses = None
+    timestamp = None
+
+    def isOpened(self):
+        raise NotImplementedError
+
+    def read(self):
+        raise NotImplementedError
+
+    def release(self):
+        pass
+
+
+class VideoCaptureSource(CaptureSource):
+    """A camera index or a video file opened through cv2.VideoCapture."""
+
+    def __init__(self, target):
+        self._cap = cv2.VideoCapture(target)
+        if not isinstance(target, int):
+            self.fps = self._cap.get(cv2.CAP_PROP_FPS) or REPLAY_DEFAULT_FPS
+
+    def isOpened(self):
+        return self._cap.isOpened()
+
+    def read(self):
+        return self._cap.read()
+
+    def release(self):
+        self._cap.release()
+
+
+class ImageDirSource(CaptureSource):
+    """Images of a directory in file name order, played back at `fps`."""
+
+    def __init__(self, path, fps=REPLAY_DEFAULT_FPS):
+        self.fps = fps
+        self._paths = sorted(os.path.join(path, name) for name in os.listdir(path)
+                             if name.lower().endswith(IMAGE_EXTENSIONS))
+        self._index = 0
+
+    def isOpened(self):
+        return self._index < len(self._paths)
+
+    def read(self):
+        if not self.isOpened():
+            return False, None
+        frame = cv2.imread(self._paths[self._index])
+        self._index += 1
+        return frame is not None, frame
+
+
+class KeypointFileSource(CaptureSource):
+    """Recorded detections replayed without images or inference.
+
+    Reads anything load_pose_recording() accepts. Frames are blank images of
+    the recorded size so feeds can still draw on them.
+    """
+
+    def __init__(self, path):
+        self.recording = load_pose_recording(path)
+        self._frame = np.zeros(self.recording.frame_shape or REPLAY_FRAME_SHAPE, dtype=np.uint8)
+        self._index = 0
+        intervals = np.diff(self.recording.timestamps)
+        self.fps = 1.0 / float(np.median(intervals)) if len(intervals) and np.median(intervals) > 0 else REPLAY_DEFAULT_FPS
+
+    def isOpened(self):
+        return self._index < self.recording.frames
+
+    def read(self):
+        if not self.isOpened():
+            self.poses = self.timestamp = None
+            return False, None
+        self.poses = self.recording.poses(self._index)
+        self.timestamp = float(self.recording.timestamps[self._index])
+        self._index += 1
+        return True, self._frame
+
+
+def is_pose_recording(spec):
+    spec = str(spec)
+    return spec.lower().endswith('.npz') or os.path.isfile(os.path.join(spec, RECORDING_INDEX))
+
+
+def open_capture_source(spec):
+    """Open a camera index, video file, image directory or pose recording (.npz or PoseRecorder directory)."""
+    if isinstance(spec, CaptureSource):
+        return spec
+    if isinstance(spec, int) or str(spec).isdigit():
+        return VideoCaptureSource(int(spec))
+    if is_pose_recording(spec):
+        return KeypointFileSource(spec)
+    if os.path.isdir(spec):
+        return ImageDirSource(spec)
+    return VideoCaptureSource(spec)
+
+
+# Shared camera capture
+CAMERA_INDEX = 0
+CAMERA_IDLE_TIMEOUT = 5.0  # Seconds to keep the camera open after the last subscriber leaves
+CAMERA_READ_TIMEOUT = 2.0  # Seconds a subscriber waits for a new frame before giving up
+CAMERA_MAX_READ_FAILURES = 30
+
+
+class SharedWorker:
+    """Background thread shared by reference-counted subscribers.
+
+    The thread starts when the first subscriber arrives and exits once nobody
+    has been subscribed for `idle_timeout` seconds.
+    """
+
+    thread_name = 'shared-worker'
+
+    def __init__(self, idle_timeout):
+        self.idle_timeout = idle_timeout
+        self._cond = threading.Condition()
+        self._subscribers = 0
+        self._last_release = 0.0
+        self._thread = None
+        self._running = False
+
+    @property
+    def subscribers(self):
+        with self._cond:
+            return self._subscribers
+
+    @property
+    def running(self):
+        with self._cond:
+            return self._running
+
+    def acquire(self):
+        with self._cond:
+            self._subscribers += 1
+            if not self._running:
+                self._running = True
+                previous = self._thread
+                self._thread = threading.Thread(target=self._thread_main, args=(previous,),
+                                                name=self.thread_name, daemon=True)
+                self._thread.start()
+
+    def release(self):
+        with self._cond:
+            self._subscribers = max(0, self._subscribers - 1)
+            if self._subscribers == 0:
+                self._last_release = time.time()
+
+    def keepalive(self):
+        """Push back the idle timeout without subscribing."""
+        with self._cond:
+            if self._subscribers == 0:
+                self._last_release = time.time()
+
+    @contextmanager
+    def subscribe(self):
+        self.acquire()
+        try:
+            yield self
+        finally:
+            self.release()
+
+    def _idle_expired(self):
+        # Must be called with self._cond held
+        if self._subscribers == 0 and time.time() - self._last_release > self.idle_timeout:
+            self._running = False
+            return True
+        return False
+
+    def _thread_main(self, previous):
+        # Let a thread that is still shutting down finish releasing its resources first
+        if previous is not None:
+            previous.join()
+        try:
+            self._run()
+        except Exception as e:
+            logger.error(f"{self.thread_name} stopped: {e}")
+        finally:
+            with self._cond:
+                if self._thread is threading.current_thread():
+                    self._running = False
+                    self._on_stopped()
+                self._cond.notify_all()
+
+    def _run(self):
+        raise NotImplementedError
+
+    def _on_stopped(self):
+        pass
+
+
+class CameraHub(SharedWorker):
+    """Owns a single capture source and shares its latest frame with all subscribers.
+
+    `source` is anything open_capture_source() accepts. Recorded sources are
+    paced to their frame rate so a replay behaves like a live camera.
+    """
+
+    thread_name = 'camera-hub'
+
+    def __init__(self, source=CAMERA_INDEX, idle_timeout=CAMERA_IDLE_TIMEOUT, clock=None):
+        super().__init__(idle_timeout)
+        self.source = source
+        self.clock = clock or SystemClock()
+        self._frame = None
+        self._frame_id = 0
+        self._frame_time = 0.0
+        self._poses = None
+
+    def read(self, last_frame_id=0, timeout=CAMERA_READ_TIMEOUT):
+        """Block until a frame newer than `last_frame_id` is available.
+
+        Returns (frame_id, timestamp, frame, poses) or (last_frame_id, 0, None,
+        None) if the camera stopped or no frame arrived in time. `poses` holds
+        recorded (boxes, keypoints) when replaying a pose recording and is None
+        otherwise. The returned frame is shared with other subscribers and must
+        not be drawn on in place.
+        """
+        deadline = time.time() + timeout
+        with self._cond:
+            while self._frame is None or self._frame_id <= last_frame_id:
+                remaining = deadline - time.time()
+                if not self._running or remaining <= 0:
+                    return last_frame_id, 0, None, None
+                self._cond.wait(remaining)
+            return self._frame_id, self._frame_time, self._frame, self._poses
+
+    def _run(self):
+        cap = open_capture_source(self.source)
+        if not cap.isOpened():
+            logger.error(f"Camera {self.source} not accessible")
+        else:
+            logger.info(f"Camera {self.source} opened")
+        failures = 0
+        next_frame_time = self.clock.now()
+        try:
+            while cap.isOpened():
+                with self._cond:
+                    if self._idle_expired():
+                        break
+                if cap.fps:
+                    self.clock.sleep(next_frame_time - self.clock.now())
+                    next_frame_time = max(next_frame_time, self.clock.now()) + 1.0 / cap.fps
+                with timed('capture'):
+                    ret, frame = cap.read()
+                if not ret:
+                    camera_read_failures.inc()
+                    failures += 1
+                    if failures >= CAMERA_MAX_READ_FAILURES:
+                        logger.error('Camera read failed')
+                        break
+                    time.sleep(0.01)
+                    continue
+                failures = 0
+                frames_captured.inc()
+                startup.milestone('first_frame')
+                with self._cond:
+                    self._frame = frame
+                    self._poses = cap.poses
+                    self._frame_id += 1
+                    self._frame_time = self.clock.now()
+                    self._cond.notify_all()
+        finally:
+            cap.release()
+            logger.info(f"Camera {self.source} released")
+
+    def _on_stopped(self):
+        self._frame = None
+        self._poses = None
+
+
+# Shared pose model
+MODEL_PATH = os.getenv('YOLO_MODEL_PATH') or 'yolov8n-pose.pt'
+if not os.path.exists(MODEL_PATH):
+    MODEL_PATH = 'yolov8n-pose.pt'
+WARMUP_FRAME_SHAPE = (480, 640, 3)
+MODEL_BACKENDS = ('torch', 'onnx', 'openvino', 'onnx-int8')
+EXPORT_SUFFIXES = {'onnx': '.onnx', 'openvino': '_openvino_model'}  # Names ultralytics recognizes on load
+EXPORT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.neulbom', 'models')  # When the model's folder is read-only
+EXPORT_HASH_LENGTH = 12  # Hex digits of the weights' SHA-256 in exported file names
+
+
+def YOLO(*args, **kwargs):
+    """ultralytics.YOLO, imported on first use because importing torch takes seconds."""
+    with startup.step('ultralytics_import'):
+        from ultralytics import YOLO as UltralyticsYOLO
+    return UltralyticsYOLO(*args, **kwargs)
+
+
+def weights_digest(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()[:EXPORT_HASH_LENGTH]
+
+
+def cached_export(path, name):
+    """Path of the cached file `name` exported from the weights at `path`, or None."""
+    for folder in (os.path.dirname(os.path.abspath(path)), EXPORT_CACHE_DIR):
+        if os.path.exists(os.path.join(folder, name)):
+            return os.path.join(folder, name)
+    return None
+
+
+def export_folder(path):
+    """Folder new exports of the weights at `path` go to, created if needed."""
+    folder = os.path.dirname(os.path.abspath(path))
+    if not os.access(folder, os.W_OK):
+        folder = EXPORT_CACHE_DIR
+    os.makedirs(folder, exist_ok=True)
+    return folder
+
+
+def export_pose_model(path, backend, imgsz):
+    """Path of the weights at `path` exported for `backend` at input size `imgsz`.
+
+    Exports are cached next to the weights, or in EXPORT_CACHE_DIR when that
+    folder is not writable (an installed app), under a name holding a hash of
+    the weights and the input size, so changed weights or sizes export again
+    and everything else loads straight from the cache. The batch dimension is
+    dynamic ('dyn' in the name), so BatchedPoseModel can send several
+    cameras' frames in one call. Exporting happens in a
+    private temporary folder and is moved into place in one step, so worker
+    processes exporting at the same time cannot see half-written files.
+    """
+    stem = os.path.splitext(os.path.basename(path))[0]
+    name = f'{stem}.{weights_digest(path)}.{imgsz}.dyn{EXPORT_SUFFIXES[backend]}'
+    cached = cached_export(path, name)
+    if cached:
+        return cached
+    folder = export_folder(path)
+    logger.info(f"Exporting {path} for {backend} at imgsz {imgsz}; later starts load the cached export")
+    start = time.time()
+    with tempfile.TemporaryDirectory(dir=folder) as scratch:
+        weights = shutil.copy(path, os.path.join(scratch, os.path.basename(path)))
+        exported = YOLO(weights).export(format=backend, imgsz=imgsz, dynamic=True, verbose=False)
+        target = os.path.join(folder, name)
+        try:
+            os.replace(exported, target)
+        except OSError:
+            if not os.path.exists(target):
+                raise
+            # Another process finished the same export first
+    logger.info(f"Exported {target} in {time.time() - start:.1f}s")
+    return target
+
+
+def load_yolo(path, backend='torch', imgsz=None, calibration=None):
+    """YOLO pose model for `backend`; exported backends are fixed to one input size.
+
+    'onnx-int8' falls back to the FP32 ONNX model when the quantized one
+    fails its accuracy check, see quantize_pose_model().
+    """
+    if backend == 'torch':
+        return YOLO(path)
+    imgsz = imgsz or DEFAULT_IMGSZ
+    if backend == 'onnx-int8':
+        int8_path, report = quantize_pose_model(path, imgsz, calibration)
+        problem = int8_problem(report)
+        if problem is None:
+            logger.info(f"Using INT8 model {int8_path} ({report['keypoint_error']:.3f} box heights mean keypoint "
+                        f"error, {report['same_count']:.0%} same people counts)")
+            return YOLO(int8_path, task='pose')
+        logger.warning(f"INT8 model rejected, using the FP32 ONNX model instead: {problem}")
+        backend = 'onnx'
+    return YOLO(export_pose_model(path, backend, imgsz), task='pose')
+
+
+def yolo_pose_arrays(result):
+    """(boxes (N, 4) xyxy, keypoints (N, 17, 2) xy) numpy arrays of one YOLO pose result."""
+    boxes = result.boxes.xyxy.cpu().numpy() if result.boxes is not None else np.zeros((0, 4), np.float32)
+    keypoints = result.keypoints.xy.cpu().numpy() if result.keypoints is not None else np.zeros((0, 17, 2), np.float32)
+    return boxes, keypoints
+
+
+class PoseModel:
+    """Process-wide YOLO pose model, loaded once and shared by every route.
+
+    Ultralytics predictors are not safe to call from several threads at once,
+    so inference is serialized behind a lock. ONNX and OpenVINO exports take
+    one input size each, so those backends load one model per imgsz in use.
+    """
+
+    concurrency = 1  # Frames the pipeline may have in flight at once
+
+    def __init__(self, path=MODEL_PATH, backend='torch', calibration=None):
+        self.path = path
+        self.backend = backend
+        self.calibration = calibration  # Clip to quantize 'onnx-int8' with
+        # Exports take tens of seconds per input size, so exported backends keep the one they started with
+        self.fixed_imgsz = backend != 'torch'
+        self.ready = threading.Event()
+        self.error = None
+        self._models = {}  # imgsz (None for torch) -> YOLO
+        self._load_lock = threading.Lock()
+        self._infer_lock = threading.Lock()
+
+    def load(self, imgsz=None):
+        key = None if self.backend == 'torch' else imgsz or DEFAULT_IMGSZ
+        with self._load_lock:
+            if key not in self._models:
+                logger.info(f"Loading pose model from {self.path} ({self.backend} backend)")
+                with startup.step('model_load'):
+                    self._models[key] = load_yolo(self.path, self.backend, key, self.calibration)
+        return self._models[key]
+
+    def warm_up(self, imgsz=None):
+        try:
+            start = time.time()
+            kwargs = {'imgsz': imgsz} if imgsz else {}
+            frame = np.zeros(WARMUP_FRAME_SHAPE, dtype=np.uint8)
+            with startup.step('warm_up'):
+                for future in [self.submit(frame, **kwargs) for _ in range(self.concurrency)]:
+                    future.result()
+            self.ready.set()
+            startup.milestone('model_ready')
+            logger.info(f"Pose model ready (warm-up took {time.time() - start:.2f}s)")
+        except Exception as e:
+            self.error = str(e)
+            logger.error(f"Pose model warm-up failed: {e}")
+
+    def __call__(self, frame, **kwargs):
+        model = self.load(kwargs.get('imgsz'))
+        with self._infer_lock:
+            return model(frame, verbose=False, **kwargs)
+
+    def detect(self, frame, **kwargs):
+        """(boxes, keypoints) arrays of the people in `frame`."""
+        with timed('inference'):
+            results = self(frame, **kwargs)
+        with timed('to_numpy'):
+            return yolo_pose_arrays(results[0])
+
+    def detect_batch(self, frames, **kwargs):
+        """detect() for several frames in one model call."""
+        with timed('inference', batch=len(frames)):
+            results = self(frames, **kwargs)
+        with timed('to_numpy'):
+            return [yolo_pose_arrays(result) for result in results]
+
+    def submit(self, frame, **kwargs):
+        """Start detecting people in `frame` and return a Future of detect()'s result.
+
+        In-process inference finishes before this returns; ProcessPoseModel
+        overlaps up to `concurrency` frames.
+        """
+        future = Future()
+        try:
+            future.set_result(self.detect(frame, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+
+pose_model = PoseModel()
+
+
+def start_model_warmup(imgsz=None):
+    threading.Thread(target=pose_model.warm_up, args=(imgsz,), name='model-warmup', daemon=True).start()
+
+
+# INT8 quantization
+INT8_CLIP_FRAMES = 200  # Frames read from the --calibration clip
+INT8_MAX_KEYPOINT_ERROR = 0.05  # Mean keypoint distance from the FP32 model, in box heights
+INT8_MIN_COUNT_AGREEMENT = 0.9  # Share of check frames whose people count must match the FP32 model
+POSE_MATCH_IOU = 0.5  # Boxes at least this similar are taken to be the same person
+LETTERBOX_FILL = 114  # Padding gray of YOLO's input letterbox
+
+
+def pose_agreement(reference, detections):
+    """(share of frames with equal people counts, keypoint errors of matched people).
+
+    Both arguments are per-frame (boxes, keypoints) lists. People are
+    matched greedily by box IoU; each error is the mean distance of the
+    keypoints found in both results, divided by the reference box height.
+    """
+    same_count = 0
+    errors = []
+    for (ref_boxes, ref_keypoints), (boxes, keypoints) in zip(reference, detections):
+        same_count += len(ref_boxes) == len(boxes)
+        if not len(ref_boxes) or not len(boxes):
+            continue
+        iou = box_iou(ref_boxes, boxes)
+        matched_ref, matched = set(), set()
+        # Most similar pairs first
+        for flat in np.argsort(iou, axis=None)[::-1]:
+            i, j = np.unravel_index(flat, iou.shape)
+            if iou[i, j] < POSE_MATCH_IOU:
+                break
+            if i in matched_ref or j in matched:
+                continue
+            matched_ref.add(i)
+            matched.add(j)
+            found = (ref_keypoints[i] != 0).any(axis=1) & (keypoints[j] != 0).any(axis=1)
+            if found.any():
+                height = max(ref_boxes[i, 3] - ref_boxes[i, 1], 1.0)
+                errors.append(np.linalg.norm(ref_keypoints[i][found] - keypoints[j][found], axis=1).mean() / height)
+    return same_count / max(len(reference), 1), np.array(errors)
+
+
+def letterbox(frame, imgsz):
+    """`frame` fitted into an imgsz square the way YOLO does, as a 1x3xHxW RGB float32 tensor in [0, 1]."""
+    height, width = frame.shape[:2]
+    scale = imgsz / max(height, width)
+    resized = cv2.resize(frame, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_LINEAR)
+    canvas = np.full((imgsz, imgsz, 3), LETTERBOX_FILL, np.uint8)
+    top, left = (imgsz - resized.shape[0]) // 2, (imgsz - resized.shape[1]) // 2
+    canvas[top:top + resized.shape[0], left:left + resized.shape[1]] = resized
+    return canvas[None, :, :, ::-1].transpose(0, 3, 1, 2).astype(np.float32) / 255
+
+
+class CalibrationFrames:
+    """onnxruntime CalibrationDataReader over captured frames."""
+
+    def __init__(self, input_name, frames, imgsz):
+        self.input_name = input_name
+        self.imgsz = imgsz
+        self._frames = iter(frames)
+
+    def get_next(self):
+        frame = next(self._frames, None)
+        return None if frame is None else {self.input_name: letterbox(frame, self.imgsz)}
+
+
+def read_clip(source, count):
+    cap = open_capture_source(source)
+    frames = []
+    try:
+        while len(frames) < count:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            if cap.poses is None:
+                frames.append(frame)
+    finally:
+        cap.release()
+    return frames
+
+
+def int8_problem(report):
+    """Why the quantized model in `report` is not accurate enough, or None if it is."""
+    if not report['people_matched']:
+        return 'nobody was detected in the check frames, so accuracy is unknown'
+    if report['keypoint_error'] > INT8_MAX_KEYPOINT_ERROR:
+        return (f"mean keypoint error {report['keypoint_error']:.3f} box heights "
+                f"exceeds {INT8_MAX_KEYPOINT_ERROR}")
+    if report['same_count'] < INT8_MIN_COUNT_AGREEMENT:
+        return f"people counts match on {report['same_count']:.0%} of frames, below {INT8_MIN_COUNT_AGREEMENT:.0%}"
+    return None
+
+
+def quantize_pose_model(path, imgsz, calibration=None):
+    """(path, accuracy report) of the INT8 ONNX model for the weights at `path`.
+
+    The FP32 ONNX export is quantized statically: activation ranges come from
+    the even frames of the `calibration` clip (a video, image directory or
+    camera index from the classroom), and the odd frames then compare the
+    INT8 model's people counts and keypoints with the FP32 model's. The
+    report is saved next to the model, so later starts reuse both until a
+    different clip is given. The pose head stays in FP32, since quantizing
+    its box and keypoint regression costs the most accuracy for little speed.
+    """
+    fp32_path = export_pose_model(path, 'onnx', imgsz)
+    name = os.path.basename(fp32_path)[:-len('.onnx')] + '.int8.onnx'
+    cached = cached_export(path, name)
+    if cached and os.path.exists(cached + '.json'):
+        with open(cached + '.json') as f:
+            report = json.load(f)
+        if calibration is None or report['calibration'] == os.path.abspath(str(calibration)):
+            return cached, report
+    if calibration is None:
+        raise ValueError('No INT8 model has been built yet; start once with --calibration <clip>')
+
+    import onnx
+    from onnxruntime.quantization import QuantFormat, QuantType, quantize_static
+
+    frames = read_clip(calibration, INT8_CLIP_FRAMES)
+    if len(frames) < 2:
+        raise ValueError(f"Could not read calibration frames from {calibration}")
+    logger.info(f"Quantizing {fp32_path} to INT8 on {len(frames[::2])} frames of {calibration}")
+    start = time.time()
+    model = onnx.load(fp32_path)
+    modules = [node.name.split('/')[1] for node in model.graph.node if node.name.startswith('/model.')]
+    head = max(modules, key=lambda module: int(module.split('.')[1]))
+    folder = export_folder(path)
+    with tempfile.TemporaryDirectory(dir=folder) as scratch:
+        int8_path = os.path.join(scratch, name)
+        quantize_static(fp32_path, int8_path, CalibrationFrames(model.graph.input[0].name, frames[::2], imgsz),
+                        quant_format=QuantFormat.QDQ, activation_type=QuantType.QUInt8,
+                        weight_type=QuantType.QInt8, per_channel=True,
+                        nodes_to_exclude=[node.name for node in model.graph.node
+                                          if node.name.startswith(f'/{head}/')])
+        # Keep the class names, stride and keypoint shape ultralytics reads on load
+        quantized = onnx.load(int8_path)
+        del quantized.metadata_props[:]
+        quantized.metadata_props.extend(model.metadata_props)
+        onnx.save(quantized, int8_path)
+
+        check = frames[1::2]
+        runs = {}
+        for label, model_path in (('fp32', fp32_path), ('int8', int8_path)):
+            yolo = YOLO(model_path, task='pose')
+            yolo(check[0], imgsz=imgsz, verbose=False)  # Warm-up
+            begin = time.perf_counter()
+            runs[label] = [yolo_pose_arrays(yolo(frame, imgsz=imgsz, verbose=False)[0]) for frame in check]
+            runs[label + '_ms'] = (time.perf_counter() - begin) / len(check) * 1000
+        same_count, errors = pose_agreement(runs['fp32'], runs['int8'])
+        report = {
+            'calibration': os.path.abspath(str(calibration)),
+            'check_frames': len(check),
+            'people_matched': len(errors),
+            'same_count': same_count,
+            'keypoint_error': float(errors.mean()) if len(errors) else 0.0,
+            'fp32_ms': round(runs['fp32_ms'], 2),
+            'int8_ms': round(runs['int8_ms'], 2),
+        }
+        target = os.path.join(folder, name)
+        os.replace(int8_path, target)
+    with open(target + '.json', 'w') as f:
+        json.dump(report, f, indent=2)
+    logger.info(f"Quantized in {time.time() - start:.0f}s: {report}")
+    return target, report
+
+
+# Multiprocess inference
+INFERENCE_SLOTS_PER_WORKER = 2  # Shared-memory frame slots per worker process
+INFERENCE_WORKER_START_TIMEOUT = 300.0  # Seconds to wait for the workers to load the model
+
+
+def _inference_worker(path, backend, calibration, imgsz, tasks, results, parent_pid, index, running):
+    """Body of an inference process: run the pose model on frames in the shared-memory ring.
+
+    `running[index]` holds the task number being worked on (0 when idle), so
+    the server can fail that task if this process dies.
+    """
+    # The server stops its workers itself; a stray signal just ends the process
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    model = PoseModel(path, backend, calibration)
+    try:
+        model.load(imgsz)
+    except Exception as e:
+        results.put(('error', None, str(e), 0.0))
+        return
+    results.put(('ready', None, None, 0.0))
+    shm = ring = None
+    try:
+        while True:
+            try:
+                task = tasks.get(timeout=1.0)
+            except queue.Empty:
+                if os.getppid() != parent_pid:
+                    break  # The server died without stopping us
+                continue
+            if task is None:
+                break
+            seq, ring_name, ring_shape, slot, shape, kwargs = task
+            running[index] = seq
+            if shm is None or shm.name != ring_name:
+                if shm is not None:
+                    ring = None
+                    shm.close()
+                shm = shared_memory.SharedMemory(name=ring_name)
+                ring = np.ndarray(ring_shape, dtype=np.uint8, buffer=shm.buf)
+            frame = ring[slot, :shape[0], :shape[1]]
+            start = time.perf_counter()
+            try:
+                prediction = model(frame, **kwargs)[0]
+                results.put((seq, yolo_pose_arrays(prediction), None, time.perf_counter() - start))
+            except Exception as e:
+                results.put((seq, None, str(e), 0.0))
+            running[index] = 0
+    finally:
+        if shm is not None:
+            ring = None
+            shm.close()
+
+
+class ProcessPoseModel(PoseModel):
+    """Pose model served by worker processes, a drop-in for PoseModel in the pipeline.
+
+    Each frame is copied once into a ring of shared-memory slots and the
+    workers run YOLO on zero-copy numpy views of it; only slot numbers go out
+    and only the small box and keypoint arrays come back over queues. Up to
+    `workers` frames are in flight at once, so inference uses other cores
+    while this process captures, draws and encodes. A worker that dies fails
+    the frame it was on and sets `error`; once none are left the model stops
+    being ready.
+    """
+
+    def __init__(self, path=MODEL_PATH, workers=1, backend='torch', calibration=None):
+        super().__init__(path, backend, calibration)
+        self.concurrency = workers
+        self._context = multiprocessing.get_context('spawn')
+        self._processes = []
+        self._running = None  # Task number each worker is on, 0 when idle
+        self._live_workers = 0
+        self._closing = False
+        self._tasks = self._results = None
+        self._state = threading.Condition()
+        self._ready_workers = 0
+        self._futures = {}  # task number -> (Future, slot)
+        self._seq = 0
+        self._ring_lock = threading.Lock()
+        self._shm = None
+        self._ring = None
+        self._free_slots = queue.Queue()
+
+    def load(self, imgsz=None):
+        """Start the worker processes and wait until each has loaded the model for `imgsz`."""
+        with self._load_lock:
+            if not self._processes:
+                logger.info(f"Starting {self.concurrency} pose worker process(es) for {self.path} "
+                            f"({self.backend} backend)")
+                if self.backend == 'onnx-int8':
+                    # Export and quantize once here rather than racing in every worker
+                    quantize_pose_model(self.path, imgsz or DEFAULT_IMGSZ, self.calibration)
+                elif self.backend != 'torch':
+                    export_pose_model(self.path, self.backend, imgsz or DEFAULT_IMGSZ)
+                self._tasks, self._results = self._context.Queue(), self._context.Queue()
+                self._running = self._context.Array('q', self.concurrency, lock=False)
+                for i in range(self.concurrency):
+                    process = self._context.Process(target=_inference_worker, name=f'pose-worker-{i}', daemon=True,
+                                                    args=(self.path, self.backend, self.calibration, imgsz,
+                                                          self._tasks, self._results, os.getpid(), i, self._running))
+                    process.start()
+                    self._processes.append(process)
+                self._live_workers = len(self._processes)
+                threading.Thread(target=self._collect, name='pose-results', daemon=True).start()
+        with self._state:
+            self._state.wait_for(lambda: self._ready_workers == self.concurrency or self.error,
+                                 INFERENCE_WORKER_START_TIMEOUT)
+            if self._ready_workers == self.concurrency:
+                return  # Workers that die later are reported through `error` by _collect
+            if self.error:
+                raise RuntimeError(self.error)
+            raise RuntimeError('Pose worker processes did not start in time')
+
+    def __call__(self, frame, **kwargs):
+        raise TypeError('ProcessPoseModel only returns arrays; use detect() or submit()')
+
+    def detect(self, frame, **kwargs):
+        return self.submit(frame, **kwargs).result(INFERENCE_RESULT_TIMEOUT)
+
+    def submit(self, frame, **kwargs):
+        self.load(kwargs.get('imgsz'))
+        if not self._live_workers:
+            raise RuntimeError(self.error or 'No pose worker process is running')
+        future = Future()
+        with self._ring_lock:
+            if self._ring is None:
+                self._allocate_ring(frame.shape)
+            elif any(n > size for n, size in zip(frame.shape, self._ring.shape[1:])):
+                # Grow to fit every shape seen, so cameras of different
+                # orientations do not take turns reallocating the ring
+                self._allocate_ring(tuple(np.maximum(frame.shape, self._ring.shape[1:])))
+            slot = self._free_slots.get()
+            ring_name, ring_shape = self._shm.name, self._ring.shape
+            height, width = frame.shape[:2]
+            with timed('shm_copy'):
+                np.copyto(self._ring[slot, :height, :width], frame)
+        with self._state:
+            self._seq += 1
+            seq = self._seq
+            self._futures[seq] = (future, slot)
+        self._tasks.put((seq, ring_name, ring_shape, slot, frame.shape, kwargs))
+        return future
+
+    def _allocate_ring(self, shape):
+        # Must be called with self._ring_lock held. Frames in flight still live
+        # in the old ring, so every slot is taken back before it goes away.
+        slots = self.concurrency * INFERENCE_SLOTS_PER_WORKER
+        if self._ring is not None:
+            for _ in range(slots):
+                self._free_slots.get()
+        old = self._shm
+        self._shm = shared_memory.SharedMemory(create=True, size=slots * int(np.prod(shape)))
+        self._ring = np.ndarray((slots,) + tuple(shape), dtype=np.uint8, buffer=self._shm.buf)
+        if old is not None:
+            old.close()
+            old.unlink()
+        for slot in range(slots):
+            self._free_slots.put(slot)
+
+    def _collect(self):
+        # Results are read before exits are handled, so a worker's last answer still counts
+        workers = {process.sentinel: i for i, process in enumerate(self._processes)}
+        reader = self._results._reader
+        while workers:
+            try:
+                ready = multiprocessing.connection.wait([reader, *workers])
+                if reader not in ready:
+                    for sentinel in ready:
+                        self._worker_exited(workers.pop(sentinel))
+                    continue
+                seq, arrays, error, elapsed = self._results.get()
+            except (EOFError, OSError):
+                break
+            with self._state:
+                if seq == 'ready':
+                    self._ready_workers += 1
+                    self._state.notify_all()
+                    continue
+                if seq == 'error':
+                    self.error = error
+                    self._state.notify_all()
+                    continue
+                entry = self._futures.pop(seq, None)
+            if entry is None:
+                continue  # Already failed when its worker was reported dead
+            future, slot = entry
+            self._free_slots.put(slot)
+            if error is not None:
+                future.set_exception(RuntimeError(error))
+            else:
+                stage_seconds.observe(elapsed, stage='inference')
+                future.set_result(arrays)
+
+    def _worker_exited(self, index):
+        process = self._processes[index]
+        process.join()
+        self._live_workers -= 1
+        if self._closing:
+            return
+        error = f"{process.name} exited with code {process.exitcode}"
+        logger.error(f"Pose worker died: {error}")
+        with self._state:
+            self.error = error
+            if self._live_workers:
+                lost = [self._running[index]]
+            else:
+                # Nobody is left to take the queued frames either
+                lost = list(self._futures)
+                self.ready.clear()
+            failed = [self._futures.pop(seq) for seq in lost if seq in self._futures]
+            self._running[index] = 0
+            self._state.notify_all()
+        for future, slot in failed:
+            self._free_slots.put(slot)
+            future.set_exception(RuntimeError(error))
+
+    def close(self):
+        self._closing = True
+        for _ in self._processes:
+            self._tasks.put(None)
+        for process in self._processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        with self._ring_lock:
+            if self._shm is not None:
+                self._ring = None
+                self._shm.close()
+                self._shm.unlink()
+                self._shm = None
+
+
+# Batched inference
+BATCH_MAX_SIZE = 4  # Frames per batched model call
+BATCH_MAX_WAIT = 0.005  # Seconds the first frame of a batch waits for frames of other sources
+BATCH_ACTIVE_WINDOW = 1.0  # Seconds a source counts as active after its last frame
+
+
+class BatchedPoseModel:
+    """Merges frames that several pipelines submit into one batched model call.
+
+    A batch is sent as soon as it holds a frame from every active source (a
+    pipeline thread that submitted within BATCH_ACTIVE_WINDOW), is full, or
+    its first frame has waited `max_wait`. With a single active source frames
+    go straight through, so one camera pays no extra latency.
+    """
+
+    concurrency = 1  # Per pipeline; the batching happens across pipelines
+
+    def __init__(self, model, max_batch=BATCH_MAX_SIZE, max_wait=BATCH_MAX_WAIT):
+        self.model = model
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self._cond = threading.Condition()
+        self._queue = deque()  # (submitted, frame, kwargs, Future)
+        self._sources = {}  # thread ident -> time of its last frame
+        self._thread = None
+
+    @property
+    def ready(self):
+        return self.model.ready
+
+    @property
+    def error(self):
+        return self.model.error
+
+    @property
+    def fixed_imgsz(self):
+        return self.model.fixed_imgsz
+
+    def warm_up(self, imgsz=None):
+        self.model.warm_up(imgsz)
+
+    def detect(self, frame, **kwargs):
+        return self.submit(frame, **kwargs).result(INFERENCE_RESULT_TIMEOUT)
+
+    def submit(self, frame, **kwargs):
+        future = Future()
+        now = time.time()
+        with self._cond:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._dispatch, name='pose-batcher', daemon=True)
+                self._thread.start()
+            self._sources[threading.get_ident()] = now
+            self._queue.append((now, frame, kwargs, future))
+            self._cond.notify_all()
+        return future
+
+    def _active_sources(self, now):
+        # Must be called with self._cond held
+        for ident in [ident for ident, last in self._sources.items() if now - last > BATCH_ACTIVE_WINDOW]:
+            del self._sources[ident]
+        return max(1, len(self._sources))
+
+    def _next_batch(self):
+        with self._cond:
+            while not self._queue:
+                self._cond.wait()
+            # A frame that queued up behind the previous batch still gives the
+            # other sources `max_wait` to catch up, or batches stay out of phase
+            deadline = max(self._queue[0][0], time.time()) + self.max_wait
+            while True:
+                now = time.time()
+                wanted = min(self.max_batch, self._active_sources(now))
+                if len(self._queue) >= wanted or now >= deadline:
+                    break
+                self._cond.wait(deadline - now)
+            # Frames asking for another input size wait for the next batch.
+            # Split by position: the items hold arrays, so comparing them
+            # (as deque.remove does) is ambiguous
+            kwargs = self._queue[0][2]
+            batch, rest = [], deque()
+            for item in self._queue:
+                (batch if len(batch) < self.max_batch and item[2] == kwargs else rest).append(item)
+            self._queue = rest
+            return batch, kwargs
+
+    def _dispatch(self):
+        while True:
+            batch, kwargs = self._next_batch()
+            try:
+                self._run_batch(batch, kwargs)
+            except Exception as e:
+                # Only this batch's callers see the error; the thread serves the next one
+                logger.exception("Batched pose detection failed")
+                for _, _, _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _run_batch(self, batch, kwargs):
+        now = time.time()
+        batch_size.observe(len(batch))
+        for submitted, _, _, _ in batch:
+            batch_wait_seconds.observe(now - submitted)
+        detections = self.model.detect_batch([frame for _, frame, _, _ in batch], **kwargs)
+        if len(detections) != len(batch):
+            raise RuntimeError(f"model returned {len(detections)} results for a batch of {len(batch)}")
+        for (_, _, _, future), arrays in zip(batch, detections):
+            future.set_result(arrays)
+
+
+# Multi-person tracking
+TRACK_IOU_THRESHOLD = 0.3  # Minimum box overlap to continue a track
+TRACK_MAX_MISSES = 5  # Inferred frames a track survives without a matching detection
+TRACK_HISTORY = 32  # Keypoint snapshots kept per track
+
+
+def box_iou(a, b):
+    """Pairwise IoU between (T, 4) and (N, 4) xyxy boxes, as a (T, N) array."""
+    top_left = np.maximum(a[:, None, :2], b[None, :, :2])
+    bottom_right = np.minimum(a[:, None, 2:], b[None, :, 2:])
+    intersection = np.prod(np.clip(bottom_right - top_left, 0, None), axis=2)
+    area_a = np.prod(a[:, 2:] - a[:, :2], axis=1)
+    area_b = np.prod(b[:, 2:] - b[:, :2], axis=1)
+    return intersection / (area_a[:, None] + area_b[None, :] - intersection + 1e-9)
+
+
+class PoseTracker:
+    """Gives detections IDs that stay with the same person across frames.
+
+    Detections are matched to existing tracks greedily by highest box IoU,
+    which is as good as optimal assignment for the handful of people in
+    front of a classroom camera and costs well under a millisecond.
+    """
+
+    def __init__(self, iou_threshold=TRACK_IOU_THRESHOLD, max_misses=TRACK_MAX_MISSES):
+        self.iou_threshold = iou_threshold
+        self.max_misses = max_misses
+        self.reset()
+
+    def reset(self):
+        self._next_id = 0
+        self._ids = np.zeros(0, dtype=np.int64)
+        self._boxes = np.zeros((0, 4), dtype=np.float32)
+        self._misses = np.zeros(0, dtype=np.int64)
+        self._history = {}  # track id -> deque of (timestamp, keypoints)
+
+    def history(self, track_id):
+        return list(self._history.get(track_id, ()))
+
+    def update(self, boxes, keypoints, timestamp):
+        """Return the track ID for each detection and record its keypoints."""
+        boxes = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)
+        ids = np.full(len(boxes), -1, dtype=np.int64)
+        matched_tracks = np.zeros(len(self._ids), dtype=bool)
+
+        if len(self._ids) and len(boxes):
+            iou = box_iou(self._boxes, boxes)
+            for flat in np.argsort(iou, axis=None)[::-1]:
+                track, detection = divmod(int(flat), len(boxes))
+                if iou[track, detection] < self.iou_threshold:
+                    break
+                if matched_tracks[track] or ids[detection] >= 0:
+                    continue
+                matched_tracks[track] = True
+                ids[detection] = self._ids[track]
+
+        # Tracks that were not seen age out; unmatched detections start new tracks
+        misses = np.where(matched_tracks, 0, self._misses + 1)
+        keep = ~matched_tracks & (misses <= self.max_misses)
+        for track_id in self._ids[~matched_tracks & ~keep]:
+            self._history.pop(int(track_id), None)
+        new = ids < 0
+        ids[new] = np.arange(self._next_id, self._next_id + int(new.sum()))
+        self._next_id += int(new.sum())
+
+        self._ids = np.concatenate([self._ids[keep], ids])
+        self._boxes = np.concatenate([self._boxes[keep], boxes])
+        self._misses = np.concatenate([misses[keep], np.zeros(len(ids), dtype=np.int64)])
+        for i, track_id in enumerate(ids):
+            history = self._history.setdefault(int(track_id), deque(maxlen=TRACK_HISTORY))
+            if i < len(keypoints):
+                history.append((timestamp, keypoints[i]))
+        return ids
+
+
+# Shared inference pipeline
+PEOPLE_COUNT_MAX_AGE = 2.0  # Seconds before /people_count waits for a fresh result
+PEOPLE_COUNT_HISTORY = 30  # Frames kept for the rolling median
+DEFAULT_IMGSZ = 640
+SKIP_MODES = ('hold', 'predict')
+INFERENCE_POLL_INTERVAL = 0.005  # Seconds between checks for finished inferences while some are in flight
+INFERENCE_RESULT_TIMEOUT = 30.0  # Seconds before a missing inference result stops the pipeline
+
+
+@dataclass(frozen=True)
+class InferenceSettings:
+    """How often and at what input size the pose model runs.
+
+    On frames between inferences the previous detections are either held as
+    they are or, in 'predict' mode, moved along their last observed velocity.
+    """
+    imgsz: int = DEFAULT_IMGSZ
+    infer_every: int = 1
+    skip_mode: str = 'hold'
+
+    def __post_init__(self):
+        # JSON gives floats and booleans too; 320.0 or true would otherwise pass the range checks
+        for name in ('imgsz', 'infer_every'):
+            value = getattr(self, name)
+            if not isinstance(value, int) or isinstance(value, bool):
+                raise ValueError(f'{name} must be an integer')
+        if not 160 <= self.imgsz <= 1280 or self.imgsz % 32:
+            raise ValueError('imgsz must be a multiple of 32 between 160 and 1280')
+        if not 1 <= self.infer_every <= 30:
+            raise ValueError('infer_every must be between 1 and 30')
+        if self.skip_mode not in SKIP_MODES:
+            raise ValueError(f"skip_mode must be one of {', '.join(SKIP_MODES)}")
+
+
+@dataclass
+class PoseResult:
+    """Pose detections for one captured frame, shared by every consumer."""
+    frame_id: int
+    timestamp: float
+    frame: np.ndarray
+    boxes: np.ndarray      # (N, 4) xyxy
+    keypoints: np.ndarray  # (N, 17, 2) xy
+    inferred: bool = True  # False when the detections were carried over from an earlier frame
+    track_ids: np.ndarray = None  # (N,) IDs that follow each person across frames
+
+    @property
+    def people(self):
+        return len(self.keypoints)
+
+    @classmethod
+    def from_yolo(cls, frame_id, timestamp, frame, result):
+        return cls(frame_id, timestamp, frame, *yolo_pose_arrays(result))
+
+    def carried_to(self, frame_id, timestamp, frame, previous=None, predict=False):
+        """Detections of this result reused for a frame that skipped inference.
+
+        With `predict` and an earlier inferred result holding the same people,
+        boxes and keypoints are extrapolated linearly to `timestamp`.
+        """
+        boxes, keypoints = self.boxes, self.keypoints
+        if predict and previous is not None and self.timestamp > previous.timestamp:
+            order = self._matching_order(previous)
+            if order is not None:
+                scale = (timestamp - self.timestamp) / (self.timestamp - previous.timestamp)
+                boxes = boxes + (boxes - previous.boxes[order]) * scale
+                keypoints = keypoints + (keypoints - previous.keypoints[order]) * scale
+        return PoseResult(frame_id, timestamp, frame, boxes, keypoints, inferred=False,
+                          track_ids=self.track_ids)
+
+    def _matching_order(self, previous):
+        """Indices into `previous` lining its people up with ours, or None if they differ."""
+        if self.track_ids is None or previous.track_ids is None:
+            return np.arange(self.people) if previous.people == self.people else None
+        positions = {int(track_id): i for i, track_id in enumerate(previous.track_ids)}
+        if any(int(track_id) not in positions for track_id in self.track_ids):
+            return None
+        return np.array([positions[int(track_id)] for track_id in self.track_ids], dtype=np.int64)
+
+
+class InferencePipeline(SharedWorker):
+    """Runs pose detection once per captured frame and publishes the result.
+
+    Feeds read the latest result; game logic registers listeners that are
+    called from the pipeline thread for every result, so it never misses a
+    frame because a slow client is still encoding.
+    """
+
+    thread_name = 'inference-pipeline'
+
+    def __init__(self, hub, model, settings=None, idle_timeout=CAMERA_IDLE_TIMEOUT):
+        super().__init__(idle_timeout)
+        self.hub = hub
+        self.model = model
+        self.settings = settings or InferenceSettings()  # Replaced as a whole, read once per frame
+        self.controller = None  # Optional InferenceController told about every frame
+        self.tracker = PoseTracker()
+        self._result = None
+        self._people_history = deque(maxlen=PEOPLE_COUNT_HISTORY)
+        self._listeners = {}  # callback -> number of times attached
+
+    @property
+    def latest(self):
+        with self._cond:
+            return self._result
+
+    def people_median(self, window):
+        """Median people count over the last `window` results, or None before the first one."""
+        with self._cond:
+            counts = list(self._people_history)[-window:]
+        if not counts:
+            return None
+        return int(round(float(np.median(counts))))
+
+    def add_listener(self, callback):
+        with self._cond:
+            self._listeners[callback] = self._listeners.get(callback, 0) + 1
+
+    def remove_listener(self, callback):
+        with self._cond:
+            count = self._listeners.get(callback, 0) - 1
+            if count > 0:
+                self._listeners[callback] = count
+            else:
+                self._listeners.pop(callback, None)
+
+    @contextmanager
+    def listening(self, callback):
+        self.add_listener(callback)
+        try:
+            yield
+        finally:
+            self.remove_listener(callback)
+
+    def read(self, last_frame_id=0, timeout=CAMERA_READ_TIMEOUT):
+        """Block until a result newer than `last_frame_id` is available, or return None."""
+        deadline = time.time() + timeout
+        with self._cond:
+            while self._result is None or self._result.frame_id <= last_frame_id:
+                remaining = deadline - time.time()
+                if not self._running or remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._result
+
+    def _run(self):
+        with self.hub.subscribe():
+            frame_id = 0
+            frames_since_inference = 0
+            last_inferred = previous_inferred = None
+            pending = deque()  # (frame_id, timestamp, frame, future, submitted) of inferences in flight
+            while True:
+                with self._cond:
+                    if self._idle_expired():
+                        break
+                # Results are published in frame order once the oldest is done or the window is full
+                while pending and (pending[0][3].done() or len(pending) >= self.model.concurrency):
+                    previous_inferred, last_inferred = last_inferred, self._finish_inference(*pending.popleft())
+                last_frame_id = frame_id
+                timeout = INFERENCE_POLL_INTERVAL if pending else CAMERA_READ_TIMEOUT
+                frame_id, timestamp, frame, poses = self.hub.read(frame_id, timeout)
+                if frame is None:
+                    if not self.hub.running:
+                        break
+                    continue
+                if last_frame_id and frame_id > last_frame_id + 1:
+                    frames_dropped.inc(frame_id - last_frame_id - 1, stage='inference')
+                settings = self.settings
+                first = last_inferred is None and not pending
+                if poses is None and (first or frames_since_inference + 1 >= settings.infer_every):
+                    # In-process models finish inside submit(), so the clock starts before it
+                    submitted = time.time()
+                    future = self.model.submit(frame, imgsz=settings.imgsz)
+                    pending.append((frame_id, timestamp, frame, future, submitted))
+                    inferences.inc()
+                    frames_since_inference = 0
+                    continue
+                # Carried over and recorded frames come after every inference still in flight
+                while pending:
+                    previous_inferred, last_inferred = last_inferred, self._finish_inference(*pending.popleft())
+                if poses is not None:
+                    # Replaying a pose recording: the detections are already known
+                    result = PoseResult(frame_id, timestamp, frame, *poses)
+                    result.track_ids = self.tracker.update(result.boxes, result.keypoints, timestamp)
+                else:
+                    result = last_inferred.carried_to(frame_id, timestamp, frame, previous_inferred,
+                                                      predict=settings.skip_mode == 'predict')
+                    frames_since_inference += 1
+                self._complete(result)
+
+    def _finish_inference(self, frame_id, timestamp, frame, future, submitted):
+        boxes, keypoints = future.result(INFERENCE_RESULT_TIMEOUT)
+        inference_time = time.time() - submitted
+        result = PoseResult(frame_id, timestamp, frame, boxes, keypoints)
+        with timed('tracking', frame_id=frame_id):
+            result.track_ids = self.tracker.update(result.boxes, result.keypoints, timestamp)
+        self._complete(result, inference_time)
+        return result
+
+    def _complete(self, result, inference_time=None):
+        self._publish(result)
+        latency = time.time() - result.timestamp
+        frame_latency_seconds.observe(latency)
+        if self.controller is not None:
+            self.controller.record_frame(latency, inference_time)
+
+    def _publish(self, result):
+        startup.milestone('first_result')
+        with self._cond:
+            self._result = result
+            self._people_history.append(result.people)
+            listeners = list(self._listeners)
+            self._cond.notify_all()
+        with timed('game', frame_id=result.frame_id):
+            for callback in listeners:
+                try:
+                    callback(result)
+                except Exception as e:
+                    logger.error('Exception in pose listener: %s', e)
+
+    def _on_stopped(self):
+        self._result = None
+        self._people_history.clear()
+        self.tracker.reset()
+
+
+# Adaptive inference scheduling
+ADAPTIVE_IMGSZ_STEPS = (256, 320, 416, 480, 640)
+ADAPTIVE_MAX_INFER_EVERY = 4
+ADAPTIVE_INTERVAL = 1.0  # Seconds between adjustments
+DEFAULT_TARGET_LATENCY = 0.1  # Seconds from capture to JPEG
+
+
+class InferenceController:
+    """Measures per-frame latency and, when adaptive, retunes the pipeline to meet a target.
+
+    End-to-end latency is estimated as capture-to-result time of inferred
+    frames plus JPEG encode time. Carried-over frames are left out: they are
+    ready almost at once, so counting them would make frame skipping look
+    like a latency win when it only buys throughput. Over budget, the input size drops first and frame skipping grows
+    once it is at its smallest; with plenty of headroom the steps are undone
+    in reverse order. Models with a fixed input size (exported backends) only
+    get their frame skipping adjusted.
+    """
+
+    def __init__(self, pipeline, target_latency=DEFAULT_TARGET_LATENCY, adaptive=False):
+        self.pipeline = pipeline
+        self.target_latency = target_latency
+        self.adaptive = adaptive
+        self._lock = threading.Lock()
+        self._result_latency = None
+        self._inference_time = None
+        self._encode_time = None
+        self._frames = 0
+        self._inferences = 0
+        self._adjustments = 0
+        self._last_adjust = 0.0
+        self._last_decision = 'none'
+
+    @staticmethod
+    def _ema(current, sample, weight=0.2):
+        return sample if current is None else current + weight * (sample - current)
+
+    def record_frame(self, result_latency, inference_time=None):
+        with self._lock:
+            self._frames += 1
+            if inference_time is not None:
+                self._inferences += 1
+                self._result_latency = self._ema(self._result_latency, result_latency)
+                self._inference_time = self._ema(self._inference_time, inference_time)
+        if self.adaptive:
+            self._maybe_adjust()
+
+    def record_encode(self, encode_time):
+        with self._lock:
+            self._encode_time = self._ema(self._encode_time, encode_time)
+
+    def latency(self):
+        with self._lock:
+            if self._result_latency is None:
+                return None
+            return self._result_latency + (self._encode_time or 0.0)
+
+    def _maybe_adjust(self):
+        now = time.time()
+        latency = self.latency()
+        with self._lock:
+            if latency is None or now - self._last_adjust < ADAPTIVE_INTERVAL:
+                return
+            self._last_adjust = now
+        settings = self.pipeline.settings
+        steps = () if self.pipeline.model.fixed_imgsz else ADAPTIVE_IMGSZ_STEPS
+        smaller = [size for size in steps if size < settings.imgsz]
+        larger = [size for size in steps if size > settings.imgsz]
+        changes, decision = {}, None
+        if latency > self.target_latency * 1.1:
+            if smaller:
+                changes, decision = {'imgsz': smaller[-1]}, 'lower imgsz'
+            elif settings.infer_every < ADAPTIVE_MAX_INFER_EVERY:
+                changes, decision = {'infer_every': settings.infer_every + 1}, 'skip more frames'
+        elif latency < self.target_latency * 0.6:
+            if settings.infer_every > 1:
+                changes, decision = {'infer_every': settings.infer_every - 1}, 'skip fewer frames'
+            elif larger:
+                changes, decision = {'imgsz': larger[0]}, 'raise imgsz'
+        if not changes:
+            return
+        self.pipeline.settings = replace(settings, **changes)
+        with self._lock:
+            self._adjustments += 1
+            self._last_decision = decision
+        logger.info(f"Adaptive inference ({latency * 1000:.0f} ms vs {self.target_latency * 1000:.0f} ms target): "
+                    f"{decision} -> {self.pipeline.settings}")
+
+    def stats(self):
+        def ms(value):
+            return None if value is None else round(value * 1000, 2)
+        latency = self.latency()
+        with self._lock:
+            return {
+                'adaptive': self.adaptive,
+                'target_latency_ms': ms(self.target_latency),
+                'latency_ms': ms(latency),
+                'result_latency_ms': ms(self._result_latency),
+                'inference_ms': ms(self._inference_time),
+                'encode_ms': ms(self._encode_time),
+                'frames': self._frames,
+                'inferences': self._inferences,
+                'adjustments': self._adjustments,
+                'last_decision': self._last_decision,
+                'settings': asdict(self.pipeline.settings),
+            }
+
+
+# Server-sent events
+EVENT_QUEUE_SIZE = 64
+EVENT_KEEPALIVE = 15.0  # Seconds between SSE comments that keep idle connections open
+
+
+class EventBus:
+    """Fans named events out to every /events client, skipping values that did not change."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._clients = set()
+        self._last = {}
+
+    def publish(self, name, data):
+        with self._lock:
+            if self._last.get(name) == data:
+                return
+            self._last[name] = data
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.put_nowait((name, data))
+            except queue.Full:
+                # Slow client: drop its oldest event rather than block the pipeline
+                try:
+                    client.get_nowait()
+                    client.put_nowait((name, data))
+                except (queue.Empty, queue.Full):
+                    pass
+
+    def subscribe(self):
+        client = queue.Queue(maxsize=EVENT_QUEUE_SIZE)
+        with self._lock:
+            # Start every client from the current state
+            for name, data in self._last.items():
+                client.put_nowait((name, data))
+            self._clients.add(client)
+        return client
+
+    def unsubscribe(self, client):
+        with self._lock:
+            self._clients.discard(client)
+
+
+# Drawing helpers
+JPEG_QUALITY = 80
+
+
+def draw_detections(frame, result):
+    with timed('draw', frame_id=result.frame_id):
+        for i, kp in enumerate(result.keypoints):
+            for x, y in kp:
+                cv2.circle(frame, (int(x), int(y)), 3, (0, 255, 0), -1)
+            if i < len(result.boxes):
+                x1, y1, x2, y2 = result.boxes[i]
+                cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (255, 0, 0), 2)
+
+
+def encode_mjpeg_part(frame, quality=JPEG_QUALITY):
+    _, jpeg = cv2.imencode('.jpg', frame, [cv2.IMWRITE_JPEG_QUALITY, quality])
+    return (b'--frame\r\n'
+            b'Content-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
+
+
+def error_mjpeg_part(text, origin, scale, thickness):
+    # Return a red error frame
+    error_frame = np.zeros((360, 480, 3), dtype=np.uint8)
+    cv2.putText(error_frame, text, origin, cv2.FONT_HERSHEY_SIMPLEX, scale, (0, 0, 255), thickness)
+    return encode_mjpeg_part(error_frame)
+
+
+# Jump detection
+JUMP_HISTORY_FRAMES = 16  # Frames of pose history per person
+JUMP_MAX_PEOPLE = 16
+JUMP_KEYPOINTS = (0, 5, 6, 11, 12)  # Nose, shoulders and hips
+
+
+@dataclass(frozen=True)
+class JumpEvent:
+    kind: str  # 'start' or 'land'
+    track_id: int
+    timestamp: float
+
+
+class JumpDetector:
+    """Detects jump starts and landings for every tracked person at once.
+
+    Recent poses live in a fixed (people x frames x keypoints x 2) ring
+    buffer with one row per track ID. Each frame the mean height of the nose,
+    shoulders and hips is compared with that person's standing height over
+    the window and with the previous sample, both normalized by body (box)
+    height so thresholds do not depend on camera resolution or distance.
+    """
+
+    def __init__(self, threshold=JUMP_THRESHOLD, min_velocity=JUMP_MIN_VELOCITY,
+                 frames=JUMP_HISTORY_FRAMES, max_people=JUMP_MAX_PEOPLE):
+        self.threshold = threshold
+        self.land_threshold = threshold / 3
+        self.min_velocity = min_velocity
+        self.frames = frames
+        self.max_people = max_people
+        self.reset()
+
+    def reset(self):
+        self._poses = np.full((self.max_people, self.frames, 17, 2), np.nan, dtype=np.float32)
+        self._heights = np.full((self.max_people, self.frames), np.nan, dtype=np.float32)
+        self._times = np.full(self.frames, np.nan)
+        self._slot_ids = np.full(self.max_people, -1, dtype=np.int64)
+        self._airborne = np.zeros(self.max_people, dtype=bool)
+        self._cursor = 0
+
+    def airborne(self, track_ids=None):
+        """Track IDs currently in the air, optionally limited to `track_ids`."""
+        ids = self._slot_ids[self._airborne & (self._slot_ids >= 0)]
+        if track_ids is not None:
+            ids = ids[np.isin(ids, track_ids)]
+        return set(int(track_id) for track_id in ids)
+
+    def _slots_for(self, track_ids):
+        slots = np.full(len(track_ids), -1, dtype=np.int64)
+        for i, track_id in enumerate(track_ids):
+            found = np.flatnonzero(self._slot_ids == track_id)
+            if len(found):
+                slots[i] = found[0]
+                continue
+            free = np.flatnonzero(self._slot_ids < 0)
+            if len(free):
+                slot = free[0]
+                self._slot_ids[slot] = track_id
+                self._poses[slot] = np.nan
+                self._heights[slot] = np.nan
+                self._airborne[slot] = False
+                slots[i] = slot
+        return slots
+
+    def update(self, track_ids, keypoints, boxes, timestamp):
+        """Add one frame of poses and return the JumpEvents it triggers."""
+        track_ids = np.asarray(track_ids, dtype=np.int64)[:len(keypoints)]
+        column = self._cursor % self.frames
+        self._cursor += 1
+        self._poses[:, column] = np.nan
+        self._heights[:, column] = np.nan
+        self._times[column] = timestamp
+
+        slots = self._slots_for(track_ids)
+        present = slots >= 0
+        slots, track_ids = slots[present], track_ids[present]
+        if len(slots):
+            self._poses[slots, column] = np.asarray(keypoints, dtype=np.float32)[present]
+            box_heights = np.asarray(boxes, dtype=np.float32).reshape(-1, 4)[:len(present)][present]
+            self._heights[slots, column] = box_heights[:, 3] - box_heights[:, 1]
+
+        # Release rows of people who have been gone for the whole window
+        gone = (self._slot_ids >= 0) & np.all(np.isnan(self._heights), axis=1)
+        self._slot_ids[gone] = -1
+        self._airborne[gone] = False
+        if not len(slots):
+            return []
+
+        # Chronological view of the window, newest frame last
+        order = (np.arange(self.frames) + column + 1) % self.frames
+        ys = self._poses[slots][:, order][:, :, JUMP_KEYPOINTS, 1]
+        valid = ys > 0  # Undetected keypoints come back as 0 (and empty frames as NaN)
+        counts = valid.sum(axis=2)
+        torso_y = np.where(counts > 0, np.where(valid, ys, 0).sum(axis=2) / np.maximum(counts, 1), np.nan)
+
+        now_y = torso_y[:, -1]
+        ok = ~np.isnan(now_y)
+        body = _nan_quantile(self._heights[slots][ok], 0.5)
+        standing = _nan_quantile(torso_y[ok], 0.75)  # Image y grows downwards
 
-# Configure logging to avoid stdout/stderr issues
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.StreamHandler(sys.stdout)
-    ]
-)
+        # Previous valid sample for the velocity estimate
+        earlier = ~np.isnan(torso_y[ok, :-1])
+        has_previous = earlier.any(axis=1)
+        previous = np.where(earlier, np.arange(self.frames - 1), -1).max(axis=1)
+        times = self._times[order]
+        previous_y = torso_y[ok][np.arange(ok.sum()), np.maximum(previous, 0)]
+        dt = np.maximum(timestamp - times[np.maximum(previous, 0)], 1e-3)
 
-# Set up logger with error handling
-logger = logging.getLogger(__name__)
+        body = np.maximum(body, 1.0)
+        rise = (standing - now_y[ok]) / body
+        velocity = np.where(has_previous, (previous_y - now_y[ok]) / dt / body, 0.0)
 
-# Custom handler to prevent EPIPE errors
-class SafeStreamHandler(logging.StreamHandler):
-    def emit(self, record):
-        try:
-            super().emit(record)
-        except (BrokenPipeError, OSError) as e:
-            # Silently ignore broken pipe errors during shutdown
-            if e.errno != 32:  # EPIPE
-                raise
+        rows = slots[ok]
+        airborne = self._airborne[rows]
+        starts = ~airborne & (rise > self.threshold) & (velocity > self.min_velocity)
+        lands = airborne & (rise < self.land_threshold)
+        self._airborne[rows] = (airborne | starts) & ~lands
 
-# Replace the default handler with our safe one
-logger.handlers.clear()
-safe_handler = SafeStreamHandler(sys.stdout)
-safe_handler.setFormatter(logging.Formatter('%(asctime)s - %(levelname)s - %(message)s'))
-logger.addHandler(safe_handler)
-logger.setLevel(logging.INFO)
+        events = [JumpEvent('start', int(track_id), timestamp) for track_id in track_ids[ok][starts]]
+        events += [JumpEvent('land', int(track_id), timestamp) for track_id in track_ids[ok][lands]]
+        return events
 
-# Signal handler for graceful shutdown
-def signal_handler(signum, frame):
-    logger.info(f"Received signal {signum}, shutting down...")
-    sys.exit(0)
 
-signal.signal(signal.SIGTERM, signal_handler)
-signal.signal(signal.SIGINT, signal_handler)
+def _nan_quantile(values, q):
+    """Per-row quantile of a 2D array ignoring NaNs; every row needs at least one number.
 
-# After you create your Flask app:
-app = Flask(__name__, static_folder='.', static_url_path='')
-CORS(app)
+    Cheaper than np.nanpercentile for the small windows used here.
+    """
+    ordered = np.sort(values, axis=1)  # NaNs sort last
+    counts = np.count_nonzero(~np.isnan(values), axis=1)
+    index = np.floor(q * (counts - 1)).astype(np.int64)
+    return ordered[np.arange(len(values)), index]
 
-# Global jump count for BR31
-br31_jump_count = 0
-br31_last_reset = time.time()
-br31_jump_times_global = []
-br31_person_history = {}
-br31_person_states = {}
-br31_last_jump_time = None
-br31_can_jump = True
-SYNC_WINDOW = 0.25
-JUMP_THRESHOLD = 50
-JUMP_END_TIMEOUT = 2.5
 
-# Global variables for koala GIF animation
-koala_frames = []
-koala_frame_index = 0
-last_frame_time = 0
-FRAME_DELAY = 0.08  # 80ms between frames for smoother animation
-koala_position_x = 0
-koala_position_y = 0
-koala_animation_offset = 0  # For bouncing effect
-koala_flip_state = False  # False = normal, True = flipped (for left movement)
-person_previous_x = None  # Track person's previous position for movement detection
+def result_track_ids(result):
+    return result.track_ids if result.track_ids is not None else np.arange(result.people)
 
-# Load the koala GIF frames once when the server starts
-def load_koala_frames():
-    global koala_frames
+
+# Game logic consuming the shared pose stream
+GAME_PROCESSORS = {}  # Feed name -> GameProcessor subclass, in registration order
+
+
+def register_game(name):
+    """Class decorator adding a GameProcessor to every camera as the feed `name`."""
+    def decorator(cls):
+        cls.name = name
+        GAME_PROCESSORS[name] = cls
+        return cls
+    return decorator
+
+
+class GameProcessor:
+    """A game driven by a camera's shared pose stream.
+
+    on_frame(result, t) runs on the inference thread for every result while
+    someone watches the game's feed, so it must be cheap; render(frame) draws
+    the current state over the skeletons on a copy of the camera frame. Any
+    number of games can listen at once without extra inference.
+    """
+
+    name = None  # Set by register_game
+
+    def __init__(self, events=None):
+        self.events = events  # EventBus told about state changes, if any
+
+    def on_frame(self, result, t):
+        pass
+
+    def render(self, frame):
+        pass
+
+    def update(self, result):
+        """Pipeline listener: on_frame() at the result's capture time."""
+        self.on_frame(result, result.timestamp)
+
+
+@register_game('main')
+class KoalaOverlay(GameProcessor):
+    """Animated koala that follows the person most in front of the camera."""
+
+    def __init__(self, events=None):
+        super().__init__(events)
+        self._lock = threading.Lock()
+        self.frame_index = 0
+        self.last_frame_time = 0
+        self.position_x = 0
+        self.position_y = 0
+        self.animation_offset = 0  # For bouncing effect
+        self.flip_state = False  # False = normal, True = flipped (for left movement)
+        self.person_previous_x = None  # Track person's previous position for movement detection
+        self.active = False
+
+    def on_frame(self, result, t):
+        # Find the person most in front (largest bounding box)
+        largest_area = 0
+        front_person = None
+        front_box = None
+        for i, box in enumerate(result.boxes):
+            if i < len(result.keypoints):
+                x1, y1, x2, y2 = box
+                area = (x2 - x1) * (y2 - y1)
+                if area > largest_area:
+                    largest_area = area
+                    front_person = result.keypoints[i]
+                    front_box = box
+
+        with self._lock:
+            self.active = front_person is not None
+            if front_person is None or len(koala_frames) == 0:
+                return
+
+            current_time = t
+
+            # Update animation frame
+            if current_time - self.last_frame_time >= FRAME_DELAY:
+                self.frame_index = (self.frame_index + 1) % len(koala_frames)
+                self.last_frame_time = current_time
+
+            # Track person's movement for koala flipping
+            # Use the center of the bounding box as reference
+            x1, y1, x2, y2 = front_box
+            person_current_x = (x1 + x2) / 2
+
+            # Determine movement direction and flip koala accordingly
+            if self.person_previous_x is not None:
+                movement_threshold = 20  # Minimum movement to trigger flip
+                if person_current_x - self.person_previous_x > movement_threshold:
+                    # Person moved right, koala faces right (normal orientation)
+                    self.flip_state = False
+                elif self.person_previous_x - person_current_x > movement_threshold:
+                    # Person moved left, koala faces left (flipped orientation)
+                    self.flip_state = True
+
+            # Update previous position for next frame
+            self.person_previous_x = person_current_x
+
+            # Create bouncing animation effect
+            self.animation_offset = int(10 * np.sin(current_time * 3))
+
+            # YOLO pose keypoints: 0=nose, 1=left_eye, 2=right_eye, 3=left_ear, 4=right_ear
+            right_eye = front_person[2] if len(front_person) > 2 else None
+            right_ear = front_person[4] if len(front_person) > 4 else None
+
+            # Position koala on the right side of the person (consistently)
+            if right_ear is not None and right_ear[0] > 0 and right_ear[1] > 0:
+                # Position near right ear
+                self.position_x = int(right_ear[0] + 60)  # Offset to the right
+                self.position_y = int(right_ear[1] - 80 + self.animation_offset)  # Above ear with bounce
+            elif right_eye is not None and right_eye[0] > 0 and right_eye[1] > 0:
+                # Position near right eye
+                self.position_x = int(right_eye[0] + 100)  # Offset to the right
+                self.position_y = int(right_eye[1] - 60 + self.animation_offset)  # Above eye with bounce
+            else:
+                # Fallback to right side of face
+                self.position_x = int(x2 + 50)  # Right side of bounding box
+                self.position_y = int(y1 + (y2 - y1) * 0.2 + self.animation_offset)  # Upper area with bounce
+
+    def render(self, frame):
+        if len(koala_frames) == 0:
+            return
+        with self._lock:
+            active = self.active
+            koala_frame = koala_frames[self.frame_index % len(koala_frames)]
+            mirrored = self.flip_state
+            koala_position_x = self.position_x
+            koala_position_y = self.position_y
+
+        if active:
+            # Flip koala based on person's movement direction
+            koala = koala_frame.sprite(koala_sprite_size(frame.shape[0]), mirrored)
+            # Keep at least half of the koala on screen; the rest is clipped at the frame edge
+            koala_height, koala_width = koala.shape[:2]
+            koala_position_y = max(-koala_height // 2, min(frame.shape[0] - koala_height // 2, koala_position_y))
+            koala_position_x = max(-koala_width // 2, min(frame.shape[1] - koala_width // 2, koala_position_x))
+            blit_sprite(frame, koala, koala_position_x, koala_position_y)
+
+        # Add status text to show koala is active
+        status_text = f"Koala: {'Active' if active else 'Waiting for person'}"
+        cv2.putText(frame, status_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
+
+
+@register_game('jump_target')
+class JumpTargetGame(GameProcessor):
+    """Jump-the-target-number game shown on /video_feed."""
+
+    def __init__(self, sync_window=SYNC_WINDOW, end_timeout=JUMP_END_TIMEOUT, threshold=JUMP_THRESHOLD, events=None):
+        super().__init__(events)
+        self._lock = threading.Lock()
+        self.sync_window = sync_window
+        self.end_timeout = end_timeout
+        self.detector = JumpDetector(threshold)
+        self.jump_target = random.randint(1, 10)
+        self.round_state = 'show_number'
+        self.state_start_time = None  # Set from the first result so replayed timestamps work too
+        self.seconds_left = 3
+        self.jump_count = 0
+        self.jump_times_global = []
+        self.jump_detected = False
+        self.result_message = ''
+        self.result_color = (0, 255, 0)
+        self.result_shown_at = 0
+        self.result_display_time = 2.0
+        self.last_jump_time = None
+        self.can_jump = True
+
+    def on_frame(self, result, t):
+        with self._lock:
+            self._update(result, t)
+            state = {
+                'state': self.round_state,
+                'target': self.jump_target,
+                'jumps': self.jump_count,
+                'message': self.result_message if self.round_state == 'result' else '',
+            }
+        if self.events is not None:
+            self.events.publish('round_state', state)
+
+    def _update(self, result, current_time):
+        keypoints = result.keypoints
+        ids_in_frame = result_track_ids(result)
+        for event in self.detector.update(ids_in_frame, keypoints, result.boxes, current_time):
+            if event.kind == 'start':
+                self.jump_times_global.append(event.timestamp)
+        all_on_ground = not self.detector.airborne(ids_in_frame)
+        if self.state_start_time is None:
+            self.state_start_time = current_time
+        # State machine for the game
+        if self.round_state == 'show_number':
+            if current_time - self.state_start_time > 1.5:
+                self.round_state = 'countdown'
+                self.state_start_time = current_time
+        elif self.round_state == 'countdown':
+            self.seconds_left = 3 - int(current_time - self.state_start_time)
+            if self.seconds_left <= 0:
+                self.round_state = 'jumping'
+                self.state_start_time = current_time
+                self.jump_count = 0
+                self.jump_times_global = []
+                self.jump_detected = False
+                self.last_jump_time = None
+                self.can_jump = True
+        elif self.round_state == 'jumping':
+            if (len(self.jump_times_global) >= len(keypoints) and not self.jump_detected and self.can_jump
+                    and all_on_ground and len(keypoints) > 0):
+                window = max(self.jump_times_global[-len(keypoints):]) - min(self.jump_times_global[-len(keypoints):])
+                if window <= self.sync_window:
+                    self.jump_count += 1
+                    self.jump_detected = True
+                    self.last_jump_time = current_time
+                    self.can_jump = False
+                else:
+                    self.round_state = 'result'
+                    self.result_message = 'Fail (Not synchronous)'
+                    self.result_color = (0, 0, 255)
+                    self.result_shown_at = current_time
+            if self.jump_detected and all_on_ground:
+                self.jump_detected = False
+                self.jump_times_global = []
+                self.can_jump = True
+            if self.jump_count > 0 and self.last_jump_time and (current_time - self.last_jump_time > self.end_timeout):
+                if self.jump_count == self.jump_target:
+                    self.round_state = 'result'
+                    self.result_message = 'Success!'
+                    self.result_color = (0, 255, 0)
+                else:
+                    self.round_state = 'result'
+                    self.result_message = 'Fail (Wrong count)'
+                    self.result_color = (0, 0, 255)
+                self.result_shown_at = current_time
+        elif self.round_state == 'result':
+            if current_time - self.result_shown_at > self.result_display_time:
+                self.jump_target = random.randint(1, 10)
+                self.round_state = 'show_number'
+                self.state_start_time = current_time
+                self.jump_count = 0
+                self.jump_times_global = []
+                self.jump_detected = False
+                self.last_jump_time = None
+                self.can_jump = True
+                self.detector.reset()
+
+    def render(self, frame):
+        with self._lock:
+            if self.round_state == 'show_number':
+                cv2.putText(frame, f'Target: {self.jump_target}', (100, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 255), 6)
+            elif self.round_state == 'countdown':
+                if self.seconds_left > 0:
+                    cv2.putText(frame, str(self.seconds_left), (250, 250), cv2.FONT_HERSHEY_SIMPLEX, 5, (42, 42, 165), 15)
+                    cv2.putText(frame, f'Target: {self.jump_target}', (100, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 255), 6)
+            elif self.round_state == 'jumping':
+                cv2.putText(frame, f'Jumps: {self.jump_count}', (100, 180), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 0, 255), 6)
+                cv2.putText(frame, f'Target: {self.jump_target}', (100, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 255), 6)
+            elif self.round_state == 'result':
+                cv2.putText(frame, self.result_message, (100, 250), cv2.FONT_HERSHEY_SIMPLEX, 2.5, self.result_color, 8)
+
+
+@register_game('people')
+class PeopleCount(GameProcessor):
+    """Number of detected people, shown on the 369 and last-word feeds."""
+
+    def __init__(self, events=None):
+        super().__init__(events)
+        self.people = 0
+
+    def on_frame(self, result, t):
+        self.people = result.people
+
+    def render(self, frame):
+        cv2.putText(frame, f'People: {self.people}', (50, 80), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 255), 6)
+
+
+@register_game('br31')
+class BR31Counter(GameProcessor):
+    """Synchronized jump counter for the BR31 game, read through /jump_count."""
+
+    def __init__(self, sync_window=SYNC_WINDOW, end_timeout=JUMP_END_TIMEOUT, threshold=JUMP_THRESHOLD, events=None):
+        super().__init__(events)
+        self._lock = threading.Lock()
+        self.sync_window = sync_window
+        self.end_timeout = end_timeout
+        self.threshold = threshold
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.jump_count = 0
+            self.last_reset = time.time()
+            self.jump_times_global = []
+            self.detector = JumpDetector(self.threshold)
+            self.last_jump_time = None
+            self.can_jump = True
+            self.num_people = 0
+        if self.events is not None:
+            self.events.publish('jump', {'count': 0})
+
+    def on_frame(self, result, t):
+        with self._lock:
+            keypoints = result.keypoints
+            current_time = t
+            self.num_people = len(keypoints)
+            ids_in_frame = result_track_ids(result)
+            for event in self.detector.update(ids_in_frame, keypoints, result.boxes, current_time):
+                if event.kind == 'start':
+                    self.jump_times_global.append(event.timestamp)
+            # Synchronized jump detection (like jump game)
+            all_on_ground = not self.detector.airborne(ids_in_frame)
+            if len(self.jump_times_global) >= len(keypoints) and self.can_jump and all_on_ground and len(keypoints) > 0:
+                window = max(self.jump_times_global[-len(keypoints):]) - min(self.jump_times_global[-len(keypoints):])
+                if window <= self.sync_window:
+                    self.jump_count += 1
+                    self.last_jump_time = current_time
+                    self.can_jump = False
+            if not self.can_jump and all_on_ground:
+                self.can_jump = True
+                self.jump_times_global = []
+            if self.jump_count > 0 and self.last_jump_time and (current_time - self.last_jump_time > self.end_timeout):
+                self.jump_times_global = []
+            jump_count = self.jump_count
+        if self.events is not None:
+            self.events.publish('jump', {'count': jump_count})
+
+    def render(self, frame):
+        with self._lock:
+            num_people, jump_count = self.num_people, self.jump_count
+        cv2.putText(frame, f'People: {num_people}', (50, 80), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 255), 6)
+        cv2.putText(frame, f'Jumps: {jump_count}', (50, 150), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 0, 255), 6)
+
+
+# MJPEG streaming
+MIN_STREAM_WIDTH = 64
+MJPEG_MIMETYPE = 'multipart/x-mixed-replace; boundary=frame'
+
+
+@dataclass(frozen=True)
+class StreamParams:
+    """Per-client MJPEG settings: ?q=<jpeg quality>&w=<width>&fps=<max frames/s>."""
+    quality: int = JPEG_QUALITY
+    width: int = 0  # 0 keeps the camera resolution
+    fps: float = 0  # 0 streams every inference result
+
+    @classmethod
+    def from_request(cls):
+        quality = request.args.get('q', default=JPEG_QUALITY, type=int)
+        width = request.args.get('w', default=0, type=int)
+        fps = request.args.get('fps', default=0, type=float)
+        return cls(
+            quality=max(10, min(100, quality)),
+            width=max(MIN_STREAM_WIDTH, width) if width > 0 else 0,
+            fps=max(0.0, fps),
+        )
+
+
+class Feed:
+    """A named video feed whose annotated frame is rendered once per result for all its clients."""
+
+    def __init__(self, name, draw, listeners=()):
+        self.name = name
+        self.draw = draw
+        self.listeners = listeners
+        self._lock = threading.Lock()
+        self._frame_id = None
+        self._frame = None
+
+    @contextmanager
+    def attached(self, pipeline):
+        """Keep the pipeline running and this feed's game logic listening while a client watches."""
+        with ExitStack() as stack:
+            stack.enter_context(pipeline.subscribe())
+            for listener in self.listeners:
+                stack.enter_context(pipeline.listening(listener))
+            yield
+
+    def frame_for(self, result):
+        """Annotated frame for `result`. Shared between clients, so callers must not draw on it."""
+        with self._lock:
+            if self._frame_id != result.frame_id:
+                frame = result.frame.copy()
+                self.draw(frame, result)
+                self._frame_id, self._frame = result.frame_id, frame
+            return self._frame
+
+
+class EncodedFeed(SharedWorker):
+    """Draws and encodes one feed at one (quality, width) on a dedicated thread.
+
+    The thread takes the newest pipeline result each time it finishes a
+    frame and publishes the JPEG in a single latest-frame slot. Results that
+    arrive while it is busy replace each other, and clients that are slower
+    than the encoder skip parts, so backpressure drops frames at every hand-off
+    instead of letting latency build up. Request handlers never draw or encode.
+    """
+
+    thread_name = 'feed-encoder'
+
+    def __init__(self, feed, params, pipeline, controller=None, idle_timeout=CAMERA_IDLE_TIMEOUT):
+        super().__init__(idle_timeout)
+        self.feed = feed
+        self.params = params
+        self.pipeline = pipeline
+        self.controller = controller
+        self.failed = False
+        self._part = None  # (frame_id, multipart chunk)
+
+    def read(self, last_frame_id=0, timeout=CAMERA_READ_TIMEOUT):
+        """Block until a part newer than `last_frame_id` is encoded; (frame_id, part) or None."""
+        deadline = time.time() + timeout
+        with self._cond:
+            while self._part is None or self._part[0] <= last_frame_id:
+                remaining = deadline - time.time()
+                if not self._running or remaining <= 0:
+                    return None
+                self._cond.wait(remaining)
+            return self._part
+
+    def _run(self):
+        self.failed = False
+        name = self.feed.name
+        with self.feed.attached(self.pipeline):
+            frame_id = 0
+            while True:
+                with self._cond:
+                    if self._idle_expired():
+                        break
+                result = self.pipeline.read(frame_id)
+                if result is None:
+                    if not self.pipeline.running:
+                        break
+                    continue
+                if frame_id and result.frame_id > frame_id + 1:
+                    frames_dropped.inc(result.frame_id - frame_id - 1, stage='encode', feed=name)
+                frame_id = result.frame_id
+                try:
+                    frame = self.feed.frame_for(result)
+                    start = time.time()
+                    with timed('encode', frame_id=frame_id, feed=name):
+                        part = encode_mjpeg_part(resize_to_width(frame, self.params.width), self.params.quality)
+                    if self.controller is not None:
+                        self.controller.record_encode(time.time() - start)
+                except Exception as e:
+                    logger.error('Exception in frame processing: %s', e)
+                    self.failed = True
+                    break
+                with self._cond:
+                    self._part = (frame_id, part)
+                    self._cond.notify_all()
+
+    def _on_stopped(self):
+        self._part = None
+
+
+class MJPEGEncoder:
+    """Hands out one EncodedFeed per (feed, quality, width), however many clients watch it."""
+
+    def __init__(self, pipeline, controller=None):
+        self.pipeline = pipeline
+        self.controller = controller
+        self._lock = threading.Lock()
+        self._workers = {}  # (feed, quality, width) -> EncodedFeed
+
+    def worker_for(self, feed, params):
+        key = (feed.name, params.quality, params.width)
+        with self._lock:
+            # Forget combinations nobody has watched since their worker stopped
+            for stale in [k for k, worker in self._workers.items() if not worker.running and not worker.subscribers]:
+                del self._workers[stale]
+            worker = self._workers.get(key)
+            if worker is None:
+                worker = self._workers[key] = EncodedFeed(feed, params, self.pipeline, self.controller)
+            return worker
+
+
+def resize_to_width(frame, width):
+    if not width or width >= frame.shape[1]:
+        return frame
+    height = max(1, round(frame.shape[0] * width / frame.shape[1]))
+    return cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+
+
+def mjpeg_stream(camera, feed_name, params):
+    """Yield multipart JPEG chunks of `feed` for one client.
+
+    Each iteration takes the newest part from the feed's encoder thread, so a
+    slow client skips frames instead of falling behind, and `params.fps` caps
+    the send rate.
+    """
+    feed = camera.feeds[feed_name]
+    stream_clients.inc(feed=feed.name)
     try:
-        gif_path = 'KakaoTalk_Photo_2025-07-17-13-41-48.gif'
-        gif = Image.open(gif_path)
-        for frame in ImageSequence.Iterator(gif):
-            # Convert to RGBA and resize to a much bigger size (400x400 pixels)
-            frame = frame.convert('RGBA')
-            frame = frame.resize((400, 400), Image.Resampling.LANCZOS)
-            # Convert to numpy array
-            frame_array = np.array(frame)
-            koala_frames.append(frame_array)
-        logger.info(f"Loaded {len(koala_frames)} koala GIF frames at 400x400 size")
+        encoder = camera.encoder.worker_for(feed, params)
+        with encoder.subscribe():
+            frame_id = 0
+            next_send = 0.0
+            while not shutdown_event.is_set():
+                if params.fps:
+                    delay = next_send - time.time()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_send = time.time() + 1.0 / params.fps
+                encoded = encoder.read(frame_id)
+                if encoded is None:
+                    # Still running means still starting up (the model may be loading or exporting)
+                    if encoder.running:
+                        continue
+                    if encoder.failed:
+                        yield error_mjpeg_part('ERROR', (100, 200), 3, 8)
+                    else:
+                        logger.error('Camera read failed')
+                    break
+                # Frames skipped on purpose by the fps cap are not counted as dropped
+                if frame_id and not params.fps and encoded[0] > frame_id + 1:
+                    frames_dropped.inc(encoded[0] - frame_id - 1, stage='stream', feed=feed.name)
+                frame_id, part = encoded
+                yield part
     except Exception as e:
-        logger.error(f"Failed to load koala GIF: {e}")
-        koala_frames = []
+        logger.error(f"Exception in feed {feed.name}: {e}")
+        yield error_mjpeg_part('SERVER ERROR', (10, 200), 2, 6)
+    finally:
+        stream_clients.dec(feed=feed.name)
+
+
+def draw_game(game, frame, result):
+    # Draw keypoints for all detected people, then the game's overlay
+    draw_detections(frame, result)
+    with timed('overlay', frame_id=result.frame_id):
+        game.render(frame)
+
+
+# Keypoint streaming
+KEYPOINT_STREAM_MIMETYPE = 'application/octet-stream'
+# Little-endian header of every message: byte length of the body, frame ID,
+# capture timestamp, frame width and height, people, then 2 bytes of padding
+KEYPOINT_HEADER = struct.Struct('<IIdHHH2x')
+KEYPOINT_VALUES = 38  # float16 per person: box x1, y1, x2, y2, then x, y of the 17 keypoints
 
-# Call this when the server starts
-load_koala_frames()
+
+def pack_keypoints(result):
+    """One binary keypoint stream message for `result`.
+
+    The body holds an int32 track ID per person (-1 when untracked) followed
+    by KEYPOINT_VALUES float16 pixel coordinates per person; keypoints YOLO
+    did not find are (0, 0). Two people cost 184 bytes, against tens of KB
+    for an annotated JPEG.
+    """
+    people = result.people
+    track_ids = np.full(people, -1, '<i4') if result.track_ids is None else np.asarray(result.track_ids, '<i4')
+    values = np.empty((people, KEYPOINT_VALUES), '<f2')
+    values[:, :4] = result.boxes
+    values[:, 4:] = result.keypoints.reshape(people, KEYPOINT_VALUES - 4)
+    body = track_ids.tobytes() + values.tobytes()
+    height, width = result.frame.shape[:2]
+    return KEYPOINT_HEADER.pack(len(body), result.frame_id, result.timestamp, width, height, people) + body
+
+
+def keypoint_stream(camera, feed_name=None, fps=0):
+    """Yield pack_keypoints() messages of every new result of `camera`.
+
+    With `feed_name` that feed's game logic listens while the client is
+    connected, as if its MJPEG feed were watched, but nothing is drawn or
+    encoded. `fps` caps the send rate.
+    """
+    game = feed_name or 'none'
+    keypoint_clients.inc(game=game)
+    try:
+        with ExitStack() as stack:
+            if feed_name:
+                stack.enter_context(camera.feeds[feed_name].attached(camera.pipeline))
+            else:
+                stack.enter_context(camera.pipeline.subscribe())
+            frame_id = 0
+            next_send = 0.0
+            while not shutdown_event.is_set():
+                if fps:
+                    delay = next_send - time.time()
+                    if delay > 0:
+                        time.sleep(delay)
+                    next_send = time.time() + 1.0 / fps
+                result = camera.pipeline.read(frame_id)
+                if result is None:
+                    if camera.pipeline.running:
+                        continue
+                    logger.error('Camera read failed')
+                    break
+                frame_id = result.frame_id
+                yield pack_keypoints(result)
+    finally:
+        keypoint_clients.dec(game=game)
+
+
+# Cameras
+class CameraChannel:
+    """One camera with its own capture, inference pipeline, game state, feeds and event stream."""
+
+    def __init__(self, index, source, model):
+        self.index = index
+        self.hub = CameraHub(source)
+        self.pipeline = InferencePipeline(self.hub, model)
+        self.controller = InferenceController(self.pipeline)
+        self.pipeline.controller = self.controller
+        self.events = EventBus()
+        self.games = {name: cls(events=self.events) for name, cls in GAME_PROCESSORS.items()}
+        self.encoder = MJPEGEncoder(self.pipeline, self.controller)
+        self.feeds = {name: Feed(name, partial(draw_game, game), listeners=(game.update,))
+                      for name, game in self.games.items()}
+
+    def publish_people_count(self, result):
+        self.events.publish('people_count', {'people': result.people})
+
+
+cameras = [CameraChannel(0, CAMERA_INDEX, pose_model)]  # Indexed by the ?cam= query parameter
+
+
+def requested_camera():
+    """The camera chosen by ?cam=N (default 0), or None if there is no such camera."""
+    # Parsed here rather than with type=int, which quietly falls back to the default on ?cam=abc
+    try:
+        index = int(request.args.get('cam', '0'))
+    except ValueError:
+        return None
+    return cameras[index] if 0 <= index < len(cameras) else None
+
+
+def unknown_camera():
+    return jsonify({'error': f"Unknown camera, expected cam=0..{len(cameras) - 1}"}), 404
+
+
+def feed_response(feed_name):
+    camera = requested_camera()
+    if camera is None:
+        return unknown_camera()
+    return Response(mjpeg_stream(camera, feed_name, StreamParams.from_request()), mimetype=MJPEG_MIMETYPE)
 
 
 @app.route('/')
@@ -106,448 +2796,88 @@ def index():
 
 @app.route('/video-feed-main')
 def video_feed_main():
-    def gen():
-        global koala_frame_index, last_frame_time
-        model = YOLO('yolov8n-pose.pt')
-        cap = cv2.VideoCapture(0)
-        
-        try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                    
-                # Get YOLO detections
-                results = model(frame)
-                boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes is not None else []
-                keypoints = results[0].keypoints.xy.cpu().numpy() if results[0].keypoints is not None else []
-                
-                # Find the person most in front (largest bounding box)
-                largest_area = 0
-                front_person = None
-                front_box = None
-                
-                for i, box in enumerate(boxes):
-                    if i < len(keypoints):
-                        x1, y1, x2, y2 = box
-                        area = (x2 - x1) * (y2 - y1)
-                        if area > largest_area:
-                            largest_area = area
-                            front_person = keypoints[i]
-                            front_box = box
-                
-                # Draw keypoints for all detected people
-                for i, kp in enumerate(keypoints):
-                    for x, y in kp:
-                        cv2.circle(frame, (int(x), int(y)), 3, (0, 255, 0), -1)
-                    if i < len(boxes):
-                        x1, y1, x2, y2 = boxes[i]
-                        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (255, 0, 0), 2)
-                
-                # If we found a person, animate the koala
-                if front_person is not None and len(koala_frames) > 0:
-                    global koala_position_x, koala_position_y, koala_animation_offset, koala_flip_state, person_previous_x
-                    
-                    current_time = time.time()
-                    
-                    # Update animation frame
-                    if current_time - last_frame_time >= FRAME_DELAY:
-                        koala_frame_index = (koala_frame_index + 1) % len(koala_frames)
-                        last_frame_time = current_time
-                    
-                    # Track person's movement for koala flipping
-                    # Use the center of the bounding box as reference
-                    x1, y1, x2, y2 = front_box
-                    person_current_x = (x1 + x2) / 2
-                    
-                    # Determine movement direction and flip koala accordingly
-                    if person_previous_x is not None:
-                        movement_threshold = 20  # Minimum movement to trigger flip
-                        if person_current_x - person_previous_x > movement_threshold:
-                            # Person moved right, koala faces right (normal orientation)
-                            koala_flip_state = False
-                        elif person_previous_x - person_current_x > movement_threshold:
-                            # Person moved left, koala faces left (flipped orientation)
-                            koala_flip_state = True
-                    
-                    # Update previous position for next frame
-                    person_previous_x = person_current_x
-                    
-                    # Create bouncing animation effect
-                    koala_animation_offset = int(10 * np.sin(current_time * 3))  # Bouncing effect
-                    
-                    # Get koala frame
-                    koala = koala_frames[koala_frame_index].copy()
-                    
-                    # YOLO pose keypoints: 0=nose, 1=left_eye, 2=right_eye, 3=left_ear, 4=right_ear
-                    # Extract key facial features
-                    nose = front_person[0] if len(front_person) > 0 else None
-                    left_eye = front_person[1] if len(front_person) > 1 else None
-                    right_eye = front_person[2] if len(front_person) > 2 else None
-                    left_ear = front_person[3] if len(front_person) > 3 else None
-                    right_ear = front_person[4] if len(front_person) > 4 else None
-                    
-                    # Position koala on the right side of the person (consistently)
-                    if right_ear is not None and right_ear[0] > 0 and right_ear[1] > 0:
-                        # Position near right ear
-                        koala_position_x = int(right_ear[0] + 60)  # Offset to the right
-                        koala_position_y = int(right_ear[1] - 80 + koala_animation_offset)  # Above ear with bounce
-                    elif right_eye is not None and right_eye[0] > 0 and right_eye[1] > 0:
-                        # Position near right eye
-                        koala_position_x = int(right_eye[0] + 100)  # Offset to the right
-                        koala_position_y = int(right_eye[1] - 60 + koala_animation_offset)  # Above eye with bounce
-                    else:
-                        # Fallback to right side of face
-                        x1, y1, x2, y2 = front_box
-                        koala_position_x = int(x2 + 50)  # Right side of bounding box
-                        koala_position_y = int(y1 + (y2 - y1) * 0.2 + koala_animation_offset)  # Upper area with bounce
-                    
-                    # Flip koala based on person's movement direction
-                    if koala_flip_state:  # Person moved left, so koala faces left
-                        koala = cv2.flip(koala, 1)
-                    
-                    # Ensure koala stays within frame bounds
-                    koala_position_y = max(0, min(frame.shape[0] - koala.shape[0], koala_position_y))
-                    koala_position_x = max(0, min(frame.shape[1] - koala.shape[1], koala_position_x))
-                    
-                    # Add a semi-transparent background for better visibility
-                    if (koala_position_y + koala.shape[0] <= frame.shape[0] and 
-                        koala_position_x + koala.shape[1] <= frame.shape[1]):
-                        
-                        # Extract the region of interest from the frame
-                        roi = frame[koala_position_y:koala_position_y + koala.shape[0], 
-                                  koala_position_x:koala_position_x + koala.shape[1]]
-                        
-                        # Convert koala to BGR (from RGBA)
-                        koala_bgr = cv2.cvtColor(koala, cv2.COLOR_RGBA2BGR)
-                        alpha = koala[:, :, 3] / 255.0  # Alpha channel (0-1)
-                        
-                        # Apply stronger alpha blending for better visibility
-                        alpha = np.clip(alpha * 1.2, 0, 1)  # Boost alpha for more visibility
-                        
-                        # Apply alpha blending
-                        for c in range(3):
-                            roi[:, :, c] = (1 - alpha) * roi[:, :, c] + alpha * koala_bgr[:, :, c]
-                        
-                        # Place the blended result back in the frame
-                        frame[koala_position_y:koala_position_y + koala.shape[0], 
-                              koala_position_x:koala_position_x + koala.shape[1]] = roi
-                
-                # Add status text to show koala is active
-                if len(koala_frames) > 0:
-                    status_text = f"Koala: {'Active' if front_person is not None else 'Waiting for person'}"
-                    cv2.putText(frame, status_text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
-                
-                # Encode and yield the frame
-                _, jpeg = cv2.imencode('.jpg', frame)
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
-                
-        finally:
-            cap.release()
-            
-    return Response(gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return feed_response('main')
 
 
 @app.route('/video_feed')
 def video_feed():
-    def gen():
-        model = YOLO('yolov8n-pose.pt')
-        JUMP_THRESHOLD = 50
-        SYNC_WINDOW = 0.25
-        person_history = {}
-        person_states = {}
-        jump_target = random.randint(1, 10)
-        round_state = 'show_number'
-        state_start_time = time.time()
-        jump_count = 0
-        jump_times_global = []
-        jump_detected = False
-        result_message = ''
-        result_color = (0, 255, 0)
-        result_shown_at = 0
-        result_display_time = 2.0
-        JUMP_END_TIMEOUT = 2.5
-        last_jump_time = None
-        can_jump = True
-        cap = cv2.VideoCapture(0)
-        try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                results = model(frame)
-                boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes is not None else []
-                keypoints = results[0].keypoints.xy.cpu().numpy() if results[0].keypoints is not None else []
-                current_time = time.time()
-                jump_times = []
-                ids_in_frame = []
-                for i, kp in enumerate(keypoints):
-                    if kp.shape[0] == 0:
-                        continue
-                    nose = kp[0]
-                    nose_x, nose_y = nose[0], nose[1]
-                    person_id = i
-                    ids_in_frame.append(person_id)
-                    prev_y = person_history.get(person_id, nose_y)
-                    state = person_states.get(person_id, 'ground')
-                    if state == 'ground' and prev_y - nose_y > JUMP_THRESHOLD:
-                        jump_times.append((person_id, current_time))
-                        person_states[person_id] = 'air'
-                        jump_times_global.append(current_time)
-                    elif state == 'air':
-                        if abs(nose_y - prev_y) < JUMP_THRESHOLD // 3:
-                            person_states[person_id] = 'ground'
-                    person_history[person_id] = nose_y
-                    for x, y in kp:
-                        cv2.circle(frame, (int(x), int(y)), 3, (0, 255, 0), -1)
-                    if i < len(boxes):
-                        x1, y1, x2, y2 = boxes[i]
-                        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (255, 0, 0), 2)
-                for pid in list(person_history.keys()):
-                    if pid not in ids_in_frame:
-                        del person_history[pid]
-                        if pid in person_states:
-                            del person_states[pid]
-                # State machine for the game
-                if round_state == 'show_number':
-                    cv2.putText(frame, f'Target: {jump_target}', (100, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 255), 6)
-                    if current_time - state_start_time > 1.5:
-                        round_state = 'countdown'
-                        state_start_time = current_time
-                elif round_state == 'countdown':
-                    seconds_left = 3 - int(current_time - state_start_time)
-                    if seconds_left > 0:
-                        cv2.putText(frame, str(seconds_left), (250, 250), cv2.FONT_HERSHEY_SIMPLEX, 5, (42, 42, 165), 15)
-                        cv2.putText(frame, f'Target: {jump_target}', (100, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 255), 6)
-                    else:
-                        round_state = 'jumping'
-                        state_start_time = current_time
-                        jump_count = 0
-                        jump_times_global = []
-                        jump_detected = False
-                        last_jump_time = None
-                        can_jump = True
-                elif round_state == 'jumping':
-                    all_on_ground = all(person_states.get(pid, 'ground') == 'ground' for pid in ids_in_frame)
-                    if len(jump_times_global) >= len(keypoints) and not jump_detected and can_jump and all_on_ground:
-                        window = max(jump_times_global[-len(keypoints):]) - min(jump_times_global[-len(keypoints):])
-                        if window <= SYNC_WINDOW:
-                            jump_count += 1
-                            jump_detected = True
-                            last_jump_time = current_time
-                            can_jump = False
-                        else:
-                            round_state = 'result'
-                            result_message = 'Fail (Not synchronous)'
-                            result_color = (0, 0, 255)
-                            result_shown_at = current_time
-                    if jump_detected and all(person_states.get(pid, 'ground') == 'ground' for pid in ids_in_frame):
-                        jump_detected = False
-                        jump_times_global = []
-                        can_jump = True
-                    if jump_count > 0 and last_jump_time and (current_time - last_jump_time > JUMP_END_TIMEOUT):
-                        if jump_count == jump_target:
-                            round_state = 'result'
-                            result_message = 'Success!'
-                            result_color = (0, 255, 0)
-                        else:
-                            round_state = 'result'
-                            result_message = 'Fail (Wrong count)'
-                            result_color = (0, 0, 255)
-                        result_shown_at = current_time
-                    cv2.putText(frame, f'Jumps: {jump_count}', (100, 180), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 0, 255), 6)
-                    cv2.putText(frame, f'Target: {jump_target}', (100, 100), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 255, 255), 6)
-                elif round_state == 'result':
-                    cv2.putText(frame, result_message, (100, 250), cv2.FONT_HERSHEY_SIMPLEX, 2.5, result_color, 8)
-                    if current_time - result_shown_at > result_display_time:
-                        jump_target = random.randint(1, 10)
-                        round_state = 'show_number'
-                        state_start_time = current_time
-                        jump_count = 0
-                        jump_times_global = []
-                        jump_detected = False
-                        last_jump_time = None
-                        can_jump = True
-                        for pid in list(person_states.keys()):
-                            person_states[pid] = 'ground'
-                        for pid in list(person_history.keys()):
-                            person_history[pid] = 0
-                _, jpeg = cv2.imencode('.jpg', frame)
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
-        finally:
-            cap.release()
-    return Response(gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return feed_response('jump_target')
 
 
 @app.route('/video-feed-369')
 def video_feed_369():
-    def gen():
-        model = YOLO('yolov8n-pose.pt')
-        cap = cv2.VideoCapture(0)
-        try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                results = model(frame)
-                boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes is not None else []
-                keypoints = results[0].keypoints.xy.cpu().numpy() if results[0].keypoints is not None else []
-                num_people = len(keypoints)
-                cv2.putText(frame, f'People: {num_people}', (50, 80), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 255), 6)
-                for i, kp in enumerate(keypoints):
-                    for x, y in kp:
-                        cv2.circle(frame, (int(x), int(y)), 3, (0, 255, 0), -1)
-                    if i < len(boxes):
-                        x1, y1, x2, y2 = boxes[i]
-                        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (255, 0, 0), 2)
-                _, jpeg = cv2.imencode('.jpg', frame)
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
-        finally:
-            cap.release()
-    return Response(gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return feed_response('people')
 
 
 @app.route('/video-feed-lastWord')
 def video_feed_lastWord():
-    def gen():
-        model = YOLO('yolov8n-pose.pt')
-        cap = cv2.VideoCapture(0)
-        try:
-            while cap.isOpened():
-                ret, frame = cap.read()
-                if not ret:
-                    break
-                results = model(frame)
-                boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes is not None else []
-                keypoints = results[0].keypoints.xy.cpu().numpy() if results[0].keypoints is not None else []
-                num_people = len(keypoints)
-                cv2.putText(frame, f'People: {num_people}', (50, 80), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 255), 6)
-                for i, kp in enumerate(keypoints):
-                    for x, y in kp:
-                        cv2.circle(frame, (int(x), int(y)), 3, (0, 255, 0), -1)
-                    if i < len(boxes):
-                        x1, y1, x2, y2 = boxes[i]
-                        cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (255, 0, 0), 2)
-                _, jpeg = cv2.imencode('.jpg', frame)
-                yield (b'--frame\r\n'
-                       b'Content-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
-        finally:
-            cap.release()
-    return Response(gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return feed_response('people')
 
 
 @app.route('/video-feed-br')
 def video_feed_br():
-    def gen():
-        global br31_jump_count, br31_jump_times_global, br31_person_history, br31_person_states, br31_last_jump_time, br31_can_jump
-        try:
-            model = YOLO('yolov8n-pose.pt')
-            cap = cv2.VideoCapture(0)
-            try:
-                while cap.isOpened():
-                    ret, frame = cap.read()
-                    if not ret:
-                        logger.error('Camera read failed')
-                        break
-                    try:
-                        results = model(frame)
-                        boxes = results[0].boxes.xyxy.cpu().numpy() if results[0].boxes is not None else []
-                        keypoints = results[0].keypoints.xy.cpu().numpy() if results[0].keypoints is not None else []
-                        num_people = len(keypoints)
-                        current_time = time.time()
-                        jump_times = []
-                        ids_in_frame = []
-                        for i, kp in enumerate(keypoints):
-                            if kp.shape[0] == 0:
-                                continue
-                            nose = kp[0]
-                            nose_x, nose_y = nose[0], nose[1]
-                            person_id = i
-                            ids_in_frame.append(person_id)
-                            prev_y = br31_person_history.get(person_id, nose_y)
-                            state = br31_person_states.get(person_id, 'ground')
-                            if state == 'ground' and prev_y - nose_y > JUMP_THRESHOLD:
-                                jump_times.append((person_id, current_time))
-                                br31_person_states[person_id] = 'air'
-                                br31_jump_times_global.append(current_time)
-                            elif state == 'air':
-                                if abs(nose_y - prev_y) < JUMP_THRESHOLD // 3:
-                                    br31_person_states[person_id] = 'ground'
-                            br31_person_history[person_id] = nose_y
-                            for x, y in kp:
-                                cv2.circle(frame, (int(x), int(y)), 3, (0, 255, 0), -1)
-                            if i < len(boxes):
-                                x1, y1, x2, y2 = boxes[i]
-                                cv2.rectangle(frame, (int(x1), int(y1)), (int(x2), int(y2)), (255, 0, 0), 2)
-                        for pid in list(br31_person_history.keys()):
-                            if pid not in ids_in_frame:
-                                del br31_person_history[pid]
-                                if pid in br31_person_states:
-                                    del br31_person_states[pid]
-                        # Synchronized jump detection (like jump game)
-                        all_on_ground = all(br31_person_states.get(pid, 'ground') == 'ground' for pid in ids_in_frame)
-                        if len(br31_jump_times_global) >= len(keypoints) and br31_can_jump and all_on_ground and len(keypoints) > 0:
-                            window = max(br31_jump_times_global[-len(keypoints):]) - min(br31_jump_times_global[-len(keypoints):])
-                            if window <= SYNC_WINDOW:
-                                br31_jump_count += 1
-                                br31_last_jump_time = current_time
-                                br31_can_jump = False
-                        if not br31_can_jump and all_on_ground:
-                            br31_can_jump = True
-                            br31_jump_times_global = []
-                        if br31_jump_count > 0 and br31_last_jump_time and (current_time - br31_last_jump_time > JUMP_END_TIMEOUT):
-                            br31_jump_times_global = []
-                        cv2.putText(frame, f'People: {num_people}', (50, 80), cv2.FONT_HERSHEY_SIMPLEX, 2, (0, 0, 255), 6)
-                        cv2.putText(frame, f'Jumps: {br31_jump_count}', (50, 150), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 0, 255), 6)
-                        _, jpeg = cv2.imencode('.jpg', frame)
-                        yield (b'--frame\r\n'
-                               b'Content-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
-                    except Exception as e:
-                        logger.error('Exception in frame processing: %s', e)
-                        # Return a red error frame
-                        error_frame = np.zeros((360, 480, 3), dtype=np.uint8)
-                        cv2.putText(error_frame, 'ERROR', (100, 200), cv2.FONT_HERSHEY_SIMPLEX, 3, (0,0,255), 8)
-                        _, jpeg = cv2.imencode('.jpg', error_frame)
-                        yield (b'--frame\r\n'
-                               b'Content-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
-                        break
-            finally:
-                cap.release()
-        except Exception as e:
-            logger.error('Exception in /video-feed-br: %s', e)
-            # Return a red error frame
-            error_frame = np.zeros((360, 480, 3), dtype=np.uint8)
-            cv2.putText(error_frame, 'SERVER ERROR', (10, 200), cv2.FONT_HERSHEY_SIMPLEX, 2, (0,0,255), 6)
-            _, jpeg = cv2.imencode('.jpg', error_frame)
-            yield (b'--frame\r\n'
-                   b'Content-Type: image/jpeg\r\n\r\n' + jpeg.tobytes() + b'\r\n')
-    return Response(gen(), mimetype='multipart/x-mixed-replace; boundary=frame')
+    return feed_response('br31')
+
+
+@app.route('/video-feed/<name>')
+def video_feed_game(name):
+    """MJPEG feed of any registered game by name."""
+    if name not in GAME_PROCESSORS:
+        return jsonify({'error': f"Unknown game, expected one of: {', '.join(GAME_PROCESSORS)}"}), 404
+    return feed_response(name)
+
+
+@app.route('/keypoints')
+def keypoints():
+    """Chunked binary stream of the poses of camera ?cam=N, see pack_keypoints().
+
+    Query parameters:
+        game: registered game whose logic should run while streaming (e.g. br31)
+        fps: maximum messages per second (default: every result)
+
+    When the camera is a local device, the X-Camera-Device header holds its index.
+    """
+    camera = requested_camera()
+    if camera is None:
+        return unknown_camera()
+    game = request.args.get('game')
+    if game is not None and game not in camera.feeds:
+        return jsonify({'error': f"Unknown game, expected one of: {', '.join(camera.feeds)}"}), 404
+    fps = max(0.0, request.args.get('fps', default=0, type=float))
+    headers = {'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    source = camera.hub.source
+    if isinstance(source, int) or str(source).isdigit():
+        # Lets the page open the same local camera; files and replays have no local equivalent
+        headers['X-Camera-Device'] = str(source)
+        headers['Access-Control-Expose-Headers'] = 'X-Camera-Device'
+    return Response(keypoint_stream(camera, game, fps), mimetype=KEYPOINT_STREAM_MIMETYPE, headers=headers)
 
 
 @app.route('/people_count')
 def people_count():
+    """Latest people count from the live pose stream.
+
+    Query parameters:
+        cam: camera index (default 0), or 'all' for every camera plus the
+             largest count among them
+        max_age: oldest acceptable result in seconds; older results trigger a fresh inference
+        smooth: report the median over the last N frames instead of the latest count
+    """
     try:
-        model = YOLO('yolov8n-pose.pt')
-        cap = cv2.VideoCapture(0)
-        if not cap.isOpened():
-            logger.warning("Camera not accessible")
-            cap.release()
-            return jsonify({'people': 0, 'error': 'Camera not accessible'})
-        
-        ret, frame = cap.read()
-        num_people = 0
-        if ret:
-            results = model(frame)
-            keypoints = results[0].keypoints.xy.cpu().numpy() if results[0].keypoints is not None else []
-            num_people = len(keypoints)
-        else:
-            logger.warning("Could not read frame from camera")
-        
-        cap.release()
-        return jsonify({'people': num_people})
+        max_age = request.args.get('max_age', default=PEOPLE_COUNT_MAX_AGE, type=float)
+        smooth = request.args.get('smooth', default=1, type=int)
+        smooth = max(1, min(PEOPLE_COUNT_HISTORY, smooth))
+
+        if request.args.get('cam') == 'all':
+            counts = {str(camera.index): camera_people_count(camera, max_age, smooth) for camera in cameras}
+            return jsonify({
+                'people': max(count['people'] for count in counts.values()),
+                'cameras': counts,
+            })
+        camera = requested_camera()
+        if camera is None:
+            return unknown_camera()
+        return jsonify(camera_people_count(camera, max_age, smooth))
     except Exception as e:
         logger.error("Error in people_count: %s", e)
         import traceback
@@ -555,24 +2885,152 @@ def people_count():
         return jsonify({'people': 0, 'error': str(e)}), 500
 
 
+def camera_people_count(camera, max_age, smooth):
+    pipeline = camera.pipeline
+    result = pipeline.latest
+    if result is None or time.time() - result.timestamp > max_age:
+        with pipeline.subscribe():
+            last_frame_id = result.frame_id if result else 0
+            result = pipeline.read(last_frame_id)
+            # Wait out a slow first result (model loading) as long as the camera is still running
+            while result is None and pipeline.running and not shutdown_event.is_set():
+                result = pipeline.read(last_frame_id)
+    else:
+        # Keep the pipeline warm while someone is polling
+        pipeline.keepalive()
+    if result is None:
+        logger.warning(f"Camera {camera.index} not accessible")
+        return {'people': 0, 'error': 'Camera not accessible'}
+
+    people = result.people
+    if smooth > 1:
+        people = pipeline.people_median(smooth)
+        if people is None:
+            people = result.people
+    return {
+        'people': people,
+        'age': round(time.time() - result.timestamp, 4),
+        'frame_id': result.frame_id,
+    }
+
+
+@app.route('/events')
+def events():
+    """Server-sent event stream of people_count, jump and round_state changes of camera ?cam=N."""
+    camera = requested_camera()
+    if camera is None:
+        return unknown_camera()
+
+    def gen():
+        client = camera.events.subscribe()
+        event_clients.inc()
+        try:
+            with camera.pipeline.subscribe(), camera.pipeline.listening(camera.publish_people_count):
+                last_sent = time.time()
+                while not shutdown_event.is_set():
+                    try:
+                        name, data = client.get(timeout=STREAM_SHUTDOWN_POLL)
+                    except queue.Empty:
+                        if time.time() - last_sent >= EVENT_KEEPALIVE:
+                            last_sent = time.time()
+                            yield ': keepalive\n\n'
+                        continue
+                    last_sent = time.time()
+                    yield f'event: {name}\ndata: {json.dumps(data)}\n\n'
+        finally:
+            event_clients.dec()
+            camera.events.unsubscribe(client)
+    return Response(gen(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+
+@app.route('/healthz')
+def healthz():
+    ready = pose_model.ready.is_set()
+    body = {'ready': ready}
+    if pose_model.error:
+        body['error'] = pose_model.error
+    return jsonify(body), 200 if ready else 503
+
+
+@app.route('/startup')
+def startup_report():
+    """Seconds to each startup milestone (imports, listening, model_ready, first_frame, first_result) and step durations."""
+    return jsonify(startup.as_dict())
+
+
+@app.route('/settings', methods=['GET', 'POST'])
+def settings():
+    """Read or change the inference settings (imgsz, infer_every, skip_mode) of camera ?cam=N at runtime."""
+    camera = requested_camera()
+    if camera is None:
+        return unknown_camera()
+    pipeline = camera.pipeline
+    if request.method == 'POST':
+        changes = request.get_json(silent=True)
+        if not isinstance(changes, dict):
+            return jsonify({'error': 'expected a JSON object of settings'}), 400
+        unknown = set(changes) - set(asdict(pipeline.settings))
+        if unknown:
+            return jsonify({'error': f"Unknown settings: {', '.join(sorted(unknown))}"}), 400
+        if pipeline.model.fixed_imgsz and changes.get('imgsz', pipeline.settings.imgsz) != pipeline.settings.imgsz:
+            return jsonify({'error': f"imgsz is fixed at {pipeline.settings.imgsz} for an exported model backend"}), 400
+        try:
+            pipeline.settings = replace(pipeline.settings, **changes)
+        except (TypeError, ValueError) as e:
+            return jsonify({'error': str(e)}), 400
+        logger.info(f"Camera {camera.index} inference settings changed: {pipeline.settings}")
+    return jsonify(asdict(pipeline.settings))
+
+
+@app.route('/stats')
+def stats():
+    """Measured pipeline timings and the adaptive controller's current decisions for camera ?cam=N."""
+    camera = requested_camera()
+    if camera is None:
+        return unknown_camera()
+    return jsonify(camera.controller.stats())
+
+
+@app.route('/metrics')
+def metrics_endpoint():
+    """Stage timing histograms, frame counters and client gauges in Prometheus text format."""
+    return Response(metrics.render(), mimetype=METRICS_MIMETYPE)
+
+
+@app.route('/trace', methods=['GET', 'POST'])
+def trace():
+    """GET: Chrome trace JSON of recorded frames. POST {"enabled": bool}: start or stop recording.
+
+    Starting a new recording discards the previous one; load the dump in
+    chrome://tracing or ui.perfetto.dev.
+    """
+    if request.method == 'POST':
+        enabled = (request.get_json(silent=True) or {}).get('enabled')
+        if not isinstance(enabled, bool):
+            return jsonify({'error': 'expected a JSON body with a boolean "enabled"'}), 400
+        frame_tracer.set_enabled(enabled)
+        return jsonify({'enabled': frame_tracer.enabled})
+    return jsonify(frame_tracer.dump())
+
+
 @app.route('/jump_count')
 def jump_count():
-    global br31_jump_count
-    return jsonify({'count': br31_jump_count})
+    camera = requested_camera()
+    if camera is None:
+        return unknown_camera()
+    return jsonify({'count': camera.games['br31'].jump_count})
 
 
 @app.route('/reset_jump_count', methods=['POST'])
 def reset_jump_count():
-    global br31_jump_count, br31_last_reset, br31_jump_times_global, br31_person_history, br31_person_states, br31_last_jump_time, br31_can_jump
-    br31_jump_count = 0
-    br31_last_reset = time.time()
-    br31_jump_times_global = []
-    br31_person_history = {}
-    br31_person_states = {}
-    br31_last_jump_time = None
-    br31_can_jump = True
+    camera = requested_camera()
+    if camera is None:
+        return unknown_camera()
+    camera.games['br31'].reset()
     return jsonify({'status': 'reset'})
 
+
 @app.route('/speech-to-text', methods=['POST'])
 def speech_to_text():
     """
@@ -644,24 +3102,182 @@ def speech_to_text():
         logging.error(f"Speech-to-text error: {str(e)}")
         return jsonify({'error': str(e)}), 500
 
+# Serving
+SERVER_MODES = ('auto', 'waitress', 'threaded', 'dev')
+DEFAULT_SERVER_THREADS = 32  # Each video or event-stream client holds one thread while it watches
+# Bytes waitress buffers for a client before the response generator blocks: a
+# few JPEG parts, so a stalled client gets the newest frame rather than a backlog
+# (waitress' default of 16 MB is seconds of video)
+WAITRESS_OUTBUF_HIGH_WATERMARK = 256 * 1024
+
+
+class PooledWSGIServer(BaseWSGIServer):
+    """Werkzeug WSGI server that handles connections on a fixed pool of daemon threads.
+
+    Unlike the development server's thread per request, the pool bounds how
+    many threads clients can tie up; further connections wait for a free
+    one. Stream handlers only forward frames the encoder threads already
+    produced, so a thread per client is cheap. Daemon threads let SIGTERM
+    end the process while streams are still open.
+    """
+
+    def __init__(self, host, port, app, threads=DEFAULT_SERVER_THREADS):
+        super().__init__(host, port, app)
+        self._connections = queue.Queue()
+        for i in range(threads):
+            threading.Thread(target=self._handle_connections, name=f'http-{i}', daemon=True).start()
+
+    def process_request(self, request, client_address):
+        self._connections.put((request, client_address))
+
+    def _handle_connections(self):
+        while True:
+            request, client_address = self._connections.get()
+            try:
+                self.finish_request(request, client_address)
+            except Exception:
+                self.handle_error(request, client_address)
+            finally:
+                self.shutdown_request(request)
+
+
+def run_server(host, port, mode='auto', threads=DEFAULT_SERVER_THREADS, debug=False):
+    """Serve `app` until the process is told to stop.
+
+    'auto' picks waitress when it is installed and the pooled werkzeug
+    server otherwise; 'dev' is Flask's development server.
+    """
+    if mode == 'auto':
+        mode = 'waitress' if importlib.util.find_spec('waitress') else 'threaded'
+    logger.info(f"Serving with the {mode} server" + ('' if mode == 'dev' else f" ({threads} threads)"))
+    # Every server is created (and bound) first so 'listening' marks the actual bind
+    if mode == 'dev':
+        # What app.run(debug=debug, use_reloader=False) does
+        app.debug = debug
+        server = make_server(host, port, DebuggedApplication(app, evalex=True) if debug else app, threaded=True)
+    elif mode == 'waitress':
+        from waitress import create_server
+        # send_bytes=1 sends every chunk right away so small server-sent events are not held back
+        server = create_server(app, host=host, port=port, threads=threads, send_bytes=1,
+                               outbuf_high_watermark=WAITRESS_OUTBUF_HIGH_WATERMARK)
+    else:
+        server = PooledWSGIServer(host, port, app, threads)
+    startup.milestone('listening')
+    if mode == 'waitress':
+        server.run()
+    else:
+        server.serve_forever()
+
+
 if __name__ == '__main__':
     import argparse
+    multiprocessing.freeze_support()  # Inference workers re-enter the frozen executable
     
     parser = argparse.ArgumentParser(description='Jump Server - Motion Detection Backend')
     parser.add_argument('--port', type=int, default=5001, help='Port to run the server on (default: 5001)')
     parser.add_argument('--host', type=str, default='0.0.0.0', help='Host to bind to (default: 0.0.0.0)')
     parser.add_argument('--debug', action='store_true', help='Enable debug mode')
+    parser.add_argument('--server', choices=SERVER_MODES, default='auto',
+                        help='HTTP server: waitress, a pooled threaded server, or the Flask dev server '
+                             '(default: auto, waitress if installed; --debug implies dev)')
+    parser.add_argument('--threads', type=int, default=DEFAULT_SERVER_THREADS,
+                        help=f'Connection threads for the waitress and threaded servers (default: {DEFAULT_SERVER_THREADS})')
+    parser.add_argument('--source', action='append',
+                        help='Camera index, video file, image directory or pose recording to replay (default: 0). '
+                             'Repeat for more cameras, addressed as ?cam=0, ?cam=1, ... in that order')
+    parser.add_argument('--record', metavar='DIR',
+                        help='Append every detection of the pose model to a pose recording in DIR '
+                             '(DIR/camN for each camera when there are several)')
+    parser.add_argument('--trace', action='store_true',
+                        help='Record a per-frame Chrome trace from startup (toggle later with POST /trace)')
+    parser.add_argument('--backend', choices=MODEL_BACKENDS, default='torch',
+                        help='Pose model runtime; onnx, openvino and onnx-int8 export the model on first use and '
+                             'cache the export for later starts; their --imgsz stays fixed (default: torch)')
+    parser.add_argument('--calibration', metavar='SOURCE',
+                        help='Clip (video, image directory or camera index) to build the onnx-int8 model from; '
+                             'it is only used when the INT8 model matches the FP32 one closely enough on this clip')
+    parser.add_argument('--inference-workers', type=int, default=0,
+                        help='Run pose inference in this many separate processes (default: 0, in the server process)')
+    parser.add_argument('--batch-size', type=int, default=BATCH_MAX_SIZE,
+                        help='Most frames of different cameras to run through the pose model in one call; '
+                             f'1 disables batching (default: {BATCH_MAX_SIZE})')
+    parser.add_argument('--batch-wait-ms', type=float, default=BATCH_MAX_WAIT * 1000,
+                        help='Longest a frame waits for frames of other cameras to join its batch '
+                             f'(default: {BATCH_MAX_WAIT * 1000:g})')
+    parser.add_argument('--imgsz', type=int, default=DEFAULT_IMGSZ,
+                        help=f'Pose model input size, a multiple of 32 (default: {DEFAULT_IMGSZ})')
+    parser.add_argument('--infer-every', type=int, default=1,
+                        help='Run the pose model on every Nth camera frame (default: 1)')
+    parser.add_argument('--skip-mode', choices=SKIP_MODES, default='hold',
+                        help='Detections on skipped frames: hold the last ones or predict from their motion (default: hold)')
+    parser.add_argument('--adaptive', action='store_true',
+                        help='Adjust imgsz and frame skipping automatically to meet --target-latency-ms')
+    parser.add_argument('--target-latency-ms', type=float, default=DEFAULT_TARGET_LATENCY * 1000,
+                        help=f'Capture-to-JPEG latency target for --adaptive (default: {DEFAULT_TARGET_LATENCY * 1000:.0f})')
     
     args = parser.parse_args()
     
+    try:
+        inference_settings = InferenceSettings(args.imgsz, args.infer_every, args.skip_mode)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.debug:
+        args.server = 'dev'
+    if args.server == 'waitress' and not importlib.util.find_spec('waitress'):
+        parser.error('waitress is not installed (pip install waitress), use --server threaded')
+    if args.threads < 1:
+        parser.error('--threads must be at least 1')
+    if args.inference_workers < 0:
+        parser.error('--inference-workers must not be negative')
+    if args.batch_size < 1:
+        parser.error('--batch-size must be at least 1')
+    if args.batch_wait_ms < 0:
+        parser.error('--batch-wait-ms must not be negative')
+    sources = args.source or [str(CAMERA_INDEX)]
+    if args.calibration and args.backend != 'onnx-int8':
+        parser.error('--calibration only applies to --backend onnx-int8')
+    pose_model.backend = args.backend
+    pose_model.calibration = args.calibration
+    if args.inference_workers:
+        # Worker processes already overlap frames of every camera
+        pose_model = ProcessPoseModel(MODEL_PATH, args.inference_workers, args.backend, args.calibration)
+        inference_model = pose_model
+    elif len(sources) > 1 and args.batch_size > 1:
+        inference_model = BatchedPoseModel(pose_model, args.batch_size, args.batch_wait_ms / 1000)
+    else:
+        inference_model = pose_model
+    cameras[:] = [CameraChannel(index, source, inference_model) for index, source in enumerate(sources)]
+    frame_tracer.set_enabled(args.trace)
+    recorders = []
+    for camera in cameras:
+        camera.pipeline.settings = inference_settings
+        camera.controller.adaptive = args.adaptive
+        camera.controller.target_latency = args.target_latency_ms / 1000
+        if args.record:
+            path = args.record if len(cameras) == 1 else os.path.join(args.record, f'cam{camera.index}')
+            recorders.append(PoseRecorder(path))
+            camera.pipeline.add_listener(recorders[-1].record)
+            logger.info(f"Recording camera {camera.index} poses to {path}")
+    
     logger.info(f"Starting Jump Server on {args.host}:{args.port}")
     logger.info(f"Debug mode: {'enabled' if args.debug else 'disabled'}")
+    for camera in cameras:
+        logger.info(f"Camera {camera.index} source: {camera.hub.source}")
+    logger.info(f"Inference settings: {inference_settings}")
+    if isinstance(inference_model, BatchedPoseModel):
+        logger.info(f"Batching up to {args.batch_size} frames, waiting at most {args.batch_wait_ms:g} ms")
+    
+    start_model_warmup(args.imgsz)
     
     try:
-        app.run(host=args.host, port=args.port, debug=args.debug, use_reloader=False)
+        run_server(args.host, args.port, args.server, args.threads, args.debug)
     except KeyboardInterrupt:
         logger.info("Server interrupted by user")
     except Exception as e:
         logger.error("Server error: %s", e)
     finally:
+        for recorder in recorders:
+            recorder.close()
+        if isinstance(pose_model, ProcessPoseModel):
+            pose_model.close()
         logger.info("Server shutting down")
\ No newline at end of file
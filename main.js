@@ -10,10 +10,65 @@ require('dotenv').config();
  require('./speech_server');
 
 let backendProcess = null;
+let backendReady = false;
+let backendLaunchedAt = 0;
+let backendListening = false;
+let backendFailed = false;
 
 // Backend configuration
 const BACKEND_PORT = process.env.BACKEND_PORT || 5001;
 const BACKEND_HOST = process.env.BACKEND_HOST || 'localhost';
+// Delay between /healthz polls: first exports or quantization can take minutes,
+// so polling backs off instead of giving up while the backend is still running
+const BACKEND_POLL_MIN_MS = 500;
+const BACKEND_POLL_MAX_MS = 5000;
+
+// Poll the backend /healthz endpoint until the pose model is warmed up. Polling
+// stops only when the backend process exits or /healthz reports an error.
+function waitForBackendReady(delay = BACKEND_POLL_MIN_MS) {
+  const http = require('http');
+
+  const retry = () => {
+    if (!backendProcess) return;
+    setTimeout(() => waitForBackendReady(Math.min(delay * 1.5, BACKEND_POLL_MAX_MS)), delay);
+  };
+
+  const req = http.get({ host: BACKEND_HOST, port: BACKEND_PORT, path: '/healthz', timeout: 1000 }, (res) => {
+    let body = '';
+    res.setEncoding('utf8');
+    res.on('data', (chunk) => { body += chunk; });
+    res.on('end', () => {
+      if (!backendListening) {
+        // Any answer means the port is bound, even while the model still loads (503)
+        backendListening = true;
+        console.log(`Backend listening ${Date.now() - backendLaunchedAt} ms after launch`);
+      }
+      let health = {};
+      try {
+        health = JSON.parse(body);
+      } catch (e) {
+        // Not our backend's JSON; keep polling
+      }
+      if (res.statusCode === 200) {
+        backendReady = true;
+        console.log(`✓ Backend ready on http://${BACKEND_HOST}:${BACKEND_PORT} ` +
+          `(${Date.now() - backendLaunchedAt} ms after launch)`);
+      } else if (health.error) {
+        backendFailed = true;
+        console.error(`✗ Backend pose model failed: ${health.error}`);
+      } else {
+        retry();
+      }
+    });
+  });
+  req.on('timeout', () => req.destroy());
+  req.on('error', retry);
+}
+
+// Pages hold their camera feeds back until this is true; with no backend
+// process of ours (not found, exited, or started separately) or a failed
+// model there is nothing to wait for
+ipcMain.handle('check-backend-ready', async () => backendReady || backendFailed || !backendProcess);
 
 // Add IPC handler for getting correct image paths
 ipcMain.handle('get-image-path', async (event, imageName) => {
@@ -320,9 +375,13 @@ app.whenReady().then(() => {
 
   const executableName = process.platform === 'win32' ? 'jump_server.exe' : 'jump_server';
 
-  // Look for the bundled executable in the packaged app
+  // Look for the bundled executable in the packaged app. A one-folder build
+  // (build_python_exe.py --onedir) starts faster and is preferred; a one-file
+  // build is a single executable.
   const possibleExecutablePaths = app.isPackaged
     ? [
+        // One-folder build in packaged app resources
+        path.join(process.resourcesPath, 'jump_server', executableName),
         // Primary location in packaged app resources
         path.join(process.resourcesPath, executableName),
         // Alternative locations for different packaging configurations
@@ -333,14 +392,18 @@ app.whenReady().then(() => {
       ]
     : [
         // Development paths
+        path.join(__dirname, 'dist', 'jump_server', executableName),
         path.join(__dirname, 'dist', executableName),
         path.join(__dirname, executableName)
       ];
 
+  // dist/jump_server is a folder in a one-folder build, so only files count
+  const isFile = (p) => fs.existsSync(p) && fs.statSync(p).isFile();
+
   console.log('Searching for backend executable in:');
   for (const testPath of possibleExecutablePaths) {
-    console.log(`  - ${testPath} (exists: ${fs.existsSync(testPath)})`);
-    if (fs.existsSync(testPath)) {
+    console.log(`  - ${testPath} (exists: ${isFile(testPath)})`);
+    if (isFile(testPath)) {
       backendPath = testPath;
       workingDir = path.dirname(testPath);
       console.log('✓ Found backend executable:', backendPath);
@@ -414,6 +477,7 @@ app.whenReady().then(() => {
     console.log('Model exists:', fs.existsSync(modelPath));
 
     try {
+      backendLaunchedAt = Date.now();
       // Start the backend with proper environment variables
       const env = {
         ...process.env,
@@ -520,10 +584,8 @@ app.whenReady().then(() => {
         backendProcess = null;
       });
 
-      // Give the backend a moment to start
-      setTimeout(() => {
-        console.log(`✓ Backend should be running on http://${BACKEND_HOST}:${BACKEND_PORT}`);
-      }, 2000);
+      // Wait until the pose model has finished warming up
+      waitForBackendReady();
 
     } catch (error) {
       console.error('✗ Failed to start backend executable:', error);
@@ -8,5 +8,6 @@ contextBridge.exposeInMainWorld('electron', {
   requestMicrophonePermission: () => ipcRenderer.invoke('request-microphone-permission'),
   checkCameraPermission: () => ipcRenderer.invoke('check-camera-permission'),
   requestCameraPermission: () => ipcRenderer.invoke('request-camera-permission'),
-  openPermissionDialog: () => ipcRenderer.invoke('open-permission-dialog')
+  openPermissionDialog: () => ipcRenderer.invoke('open-permission-dialog'),
+  checkBackendReady: () => ipcRenderer.invoke('check-backend-ready')
 });
\ No newline at end of file
@@ -97,24 +97,36 @@ function onLetsPlay369Prompt() {
     updatePeopleCount();
 }
 
+function showPlayerCount(people) {
+  playerCount = people;
+  document.getElementById('playerCountDisplay').textContent = playerCount;
+}
+
 function pollPeopleCount() {
   fetch('http://localhost:5001/people_count')
     .then(res => res.json())
-    .then(data => {
-      playerCount = data.people;
-      document.getElementById('playerCountDisplay').textContent = playerCount;
-    })
+    .then(data => showPlayerCount(data.people))
     .catch(err => {
       // Silently handle connection errors when backend isn't ready
       console.log('Backend not ready yet, skipping people count update');
     });
 }
 
-// Wait a bit before starting to poll, and then poll every 2 seconds
-setTimeout(() => {
-  // Start polling after 5 seconds to give backend time to start
-  setInterval(pollPeopleCount, 2000);
-}, 5000);
+// Receive people count changes pushed by the backend, polling only as a fallback
+function startPeopleCountStream() {
+  if (!window.EventSource) {
+    setInterval(pollPeopleCount, 2000);
+    return;
+  }
+  // EventSource reconnects on its own while the backend is still starting
+  const events = new EventSource('http://localhost:5001/events');
+  events.addEventListener('people_count', (event) => {
+    showPlayerCount(JSON.parse(event.data).people);
+  });
+}
+
+// Wait a bit before connecting to give the backend time to start
+setTimeout(startPeopleCountStream, 5000);
 
 // Microphone permission and SpeechRecognition support check
 window.addEventListener('DOMContentLoaded', async function() {